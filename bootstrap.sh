@@ -11,3 +11,14 @@ pip install -r requirements.txt
 
 # Deactivate the environment
 deactivate
+
+# Download the Nailgun server used by 'waf --jvm-server' (see tools/jvmserver.py)
+NAILGUN_URL=https://repo1.maven.org/maven2/com/martiansoftware/nailgun-server/0.9.1/nailgun-server-0.9.1.jar
+NAILGUN_JAR=src/client/tools/nailgun/nailgun-server.jar
+if [ ! -f $NAILGUN_JAR ]; then
+    mkdir -p `dirname $NAILGUN_JAR`
+    curl -fsSL -o $NAILGUN_JAR.tmp $NAILGUN_URL &&
+        echo "`curl -fsSL $NAILGUN_URL.sha1`  $NAILGUN_JAR.tmp" | sha1sum -c --quiet &&
+        mv $NAILGUN_JAR.tmp $NAILGUN_JAR ||
+        rm -f $NAILGUN_JAR.tmp
+fi
@@ -14,3 +14,9 @@
 # limitations under the License.
 
 """Package indicator for gjslint."""
+
+import logging
+
+# Warnings and internal errors are logged, and only show when logging is
+# configured, as gjslint and fixjsstyle do.  Library users get no output.
+logging.getLogger('closure_linter').addHandler(logging.NullHandler())
@@ -24,6 +24,7 @@ import gflags as flags
 from closure_linter import checkerbase
 from closure_linter import closurizednamespacesinfo
 from closure_linter import javascriptlintrules
+from closure_linter import lintoptions
 
 
 flags.DEFINE_list('closurized_namespaces', '',
@@ -37,25 +38,29 @@ flags.DEFINE_list('ignored_extra_namespaces', '',
 class JavaScriptStyleChecker(checkerbase.CheckerBase):
   """Checker that applies JavaScriptLintRules."""
 
-  def __init__(self, state_tracker, error_handler):
+  def __init__(self, state_tracker, error_handler, options=None):
     """Initialize an JavaScriptStyleChecker object.
 
     Args:
       state_tracker: State tracker.
       error_handler: Error handler to pass all errors to.
+      options: The lintoptions.LintOptions to check with.  Defaults to options
+        built from the flags.
     """
+    options = options or lintoptions.FromFlags()
+
     self._namespaces_info = None
-    if flags.FLAGS.closurized_namespaces:
+    if options.closurized_namespaces:
       self._namespaces_info = (
           closurizednamespacesinfo.ClosurizedNamespacesInfo(
-              flags.FLAGS.closurized_namespaces,
-              flags.FLAGS.ignored_extra_namespaces))
+              list(options.closurized_namespaces),
+              list(options.ignored_extra_namespaces)))
 
     checkerbase.CheckerBase.__init__(
         self,
         error_handler=error_handler,
         lint_rules=javascriptlintrules.JavaScriptLintRules(
-            self._namespaces_info),
+            self._namespaces_info, options),
         state_tracker=state_tracker)
 
   def Check(self, start_token, limited_doc_checks=False, is_html=False,
@@ -23,15 +23,22 @@ __author__ = ('robbyw@google.com (Robert Walker)',
               'ajp@google.com (Andy Perelson)',
               'jacobr@google.com (Jacob Richman)')
 
-from closure_linter import errorrules
+from closure_linter import lintoptions
 from closure_linter.common import error
 
 
 class LintRulesBase(object):
   """Base class for all classes defining the lint rules for a language."""
 
-  def __init__(self):
+  def __init__(self, options=None):
+    """Initializes the lint rules.
+
+    Args:
+      options: The lintoptions.LintOptions to check with.  Defaults to options
+        built from the flags.
+    """
     self.__checker = None
+    self._options = options or lintoptions.FromFlags()
 
   def Initialize(self, checker, limited_doc_checks, is_html):
     """Initializes to prepare to check a file.
@@ -48,7 +55,7 @@ class LintRulesBase(object):
   def _HandleError(self, code, message, token, position=None,
                    fix_data=None):
     """Call the HandleError function for the checker we are associated with."""
-    if errorrules.ShouldReportError(code):
+    if self._options.ShouldReportError(code):
       self.__checker.HandleError(code, message, token, position, fix_data)
 
   def _SetLimitedDocChecks(self, limited_doc_checks):
@@ -102,6 +109,18 @@ class CheckerBase(object):
 
     self._has_errors = False
 
+  def SetErrorHandler(self, error_handler):
+    """Sets the error handler errors are reported to.
+
+    Lets the same checker be reused for several files with a different error
+    handler for each.
+
+    Args:
+      error_handler: Object that handles errors.
+    """
+    self._error_handler = error_handler
+    self._has_errors = False
+
   def HandleError(self, code, message, token, position=None,
                   fix_data=None):
     """Prints out the given error message including a line number.
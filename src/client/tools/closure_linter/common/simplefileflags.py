@@ -20,11 +20,19 @@ __author__ = ('robbyw@google.com (Robert Walker)',
               'ajp@google.com (Andy Perelson)')
 
 import glob
+import itertools
 import os
 import re
 
 import gflags as flags
 
+# Attempt import of multiprocessing (should be available in Python 2.6 and up).
+try:
+  # pylint: disable-msg=C6204
+  from multiprocessing import pool as multiprocessing_pool
+except ImportError:
+  multiprocessing_pool = None
+
 
 FLAGS = flags.FLAGS
 
@@ -45,6 +53,9 @@ flags.DEFINE_list(
     'Exclude the specified files',
     short_name='x')
 
+# The most --recurse roots to walk concurrently.
+_MAX_WALK_THREADS = 8
+
 
 def MatchesSuffixes(filename, suffixes):
   """Returns whether the given filename matches one of the given suffixes.
@@ -91,24 +102,75 @@ def _GetUserSpecifiedFiles(argv, suffixes):
   return lint_files
 
 
+def _GetExcludedDirectoriesRegex():
+  """Returns a regex matching paths in any --exclude_directories directory.
+
+  Returns:
+    The compiled regex, or None if no directories are excluded.
+  """
+  if not FLAGS.exclude_directories:
+    return None
+  return re.compile(r'(^|[\\/])(?:%s)[\\/]' %
+                    '|'.join(FLAGS.exclude_directories))
+
+
+def _WalkFiles(start, suffixes, excluded_dirs):
+  """Returns the files under the given directory with one of the suffixes.
+
+  Excluded directories are pruned from the walk rather than filtered out
+  afterwards, so their contents are never listed.
+
+  Args:
+    start: The directory to walk.
+    suffixes: Frozenset of expected suffixes for the file type being checked.
+    excluded_dirs: Regex matching excluded directory paths, or None.
+
+  Returns:
+    A list of files to be checked.
+  """
+  lint_files = []
+  for root, subdirs, files in os.walk(start):
+    if excluded_dirs:
+      subdirs[:] = [d for d in subdirs if not
+                    excluded_dirs.search(os.path.join(root, d) + os.sep)]
+    for f in files:
+      if MatchesSuffixes(f, suffixes):
+        lint_files.append(os.path.join(root, f))
+  return lint_files
+
+
 def _GetRecursiveFiles(suffixes):
   """Returns files to be checked specified by the --recurse flag.
 
+  Several roots are walked concurrently, since the walk mostly waits on the
+  filesystem.
+
   Args:
     suffixes: Expected suffixes for the file type being checked.
 
   Returns:
     A list of files to be checked.
   """
-  lint_files = []
-  # Perform any request recursion
-  if FLAGS.recurse:
-    for start in FLAGS.recurse:
-      for root, subdirs, files in os.walk(start):
-        for f in files:
-          if MatchesSuffixes(f, suffixes):
-            lint_files.append(os.path.join(root, f))
-  return lint_files
+  if not FLAGS.recurse:
+    return []
+
+  suffixes = frozenset(suffixes)
+  excluded_dirs = _GetExcludedDirectoriesRegex()
+  walk = lambda start: _WalkFiles(start, suffixes, excluded_dirs)
+
+  starts = FLAGS.recurse
+  if len(starts) > 1 and multiprocessing_pool:
+    pool = multiprocessing_pool.ThreadPool(
+        min(len(starts), _MAX_WALK_THREADS))
+    try:
+      results = pool.map(walk, starts)
+    finally:
+      pool.close()
+      pool.join()
+  else:
+    results = map(walk, starts)
+
+  return list(itertools.chain.from_iterable(results))
 
 
 def GetAllSpecifiedFiles(argv, suffixes):
@@ -142,35 +204,33 @@ def FilterFiles(files):
   Returns:
     Filtered list of files to be linted.
   """
-  num_files = len(files)
-
-  ignore_dirs_regexs = []
-  for ignore in FLAGS.exclude_directories:
-    ignore_dirs_regexs.append(re.compile(r'(^|[\\/])%s[\\/]' % ignore))
-
-  result_files = []
+  excluded_dirs = _GetExcludedDirectoriesRegex()
+
+  # Plain file names are matched against the last path component with a set
+  # lookup; excludes containing a directory are matched as path suffixes.
+  excluded_names = set(exclude for exclude in FLAGS.exclude_files
+                       if '/' not in exclude)
+  excluded_paths = [exclude for exclude in FLAGS.exclude_files
+                    if '/' in exclude]
+  excluded_suffixes = tuple('/' + exclude for exclude in excluded_paths)
+
+  skipped = 0
+  result_files = set()
   for f in files:
-    add_file = True
-    for exclude in FLAGS.exclude_files:
-      if f.endswith('/' + exclude) or f == exclude:
-        add_file = False
-        break
-    for ignore in ignore_dirs_regexs:
-      if ignore.search(f):
-        # Break out of ignore loop so we don't add to
-        # filtered files.
-        add_file = False
-        break
-    if add_file:
+    if (f.rsplit('/', 1)[-1] in excluded_names or
+        (excluded_paths and (f.endswith(excluded_suffixes) or
+                             f in excluded_paths)) or
+        (excluded_dirs and excluded_dirs.search(f))):
+      skipped += 1
+    else:
       # Convert everything to absolute paths so we can easily remove duplicates
       # using a set.
-      result_files.append(os.path.abspath(f))
+      result_files.add(os.path.abspath(f))
 
-  skipped = num_files - len(result_files)
   if skipped:
     print 'Skipping %d file(s).' % skipped
 
-  return set(result_files)
+  return result_files
 
 
 def GetFileList(argv, file_type, suffixes):
@@ -88,15 +88,22 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
   LONG_LINE_IGNORE = frozenset(['*', '//', '@see'] +
       ['@%s' % tag for tag in statetracker.DocFlag.HAS_TYPE])
 
-  def __init__(self):
-    """Initialize this lint rule object."""
-    checkerbase.LintRulesBase.__init__(self)
+  def __init__(self, options=None):
+    """Initialize this lint rule object.
+
+    Args:
+      options: The lintoptions.LintOptions to check with.  Defaults to options
+        built from the flags.
+    """
+    checkerbase.LintRulesBase.__init__(self, options)
+    self._indentation = indentation.IndentationRules(
+        debug=self._options.debug_indentation)
 
   def Initialize(self, checker, limited_doc_checks, is_html):
     """Initialize this lint rule object before parsing a new file."""
     checkerbase.LintRulesBase.Initialize(self, checker, limited_doc_checks,
                                          is_html)
-    self._indentation = indentation.IndentationRules()
+    self._indentation.Reset()
 
   def HandleMissingParameterDoc(self, token, param_name):
     """Handle errors associated with a parameter missing a @param tag."""
@@ -156,7 +163,7 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
 
       # Custom tags like @requires may have url like descriptions, so ignore
       # the tag, similar to how we handle @see.
-      custom_tags = set(['@%s' % f for f in FLAGS.custom_jsdoc_tags])
+      custom_tags = set(['@%s' % f for f in self._options.custom_jsdoc_tags])
       if (len(parts.difference(self.LONG_LINE_IGNORE | custom_tags)) > max):
         self._HandleError(errors.LINE_TOO_LONG,
             'Line too long (%d characters).' % len(line), last_token)
@@ -183,7 +190,7 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
           self._HandleError(errors.JSDOC_ILLEGAL_QUESTION_WITH_PIPE,
               'JsDoc types cannot contain both "?" and "|": "%s"' % p, token)
 
-      if error_check.ShouldCheck(Rule.BRACES_AROUND_TYPE) and (
+      if self._options.ShouldCheck(Rule.BRACES_AROUND_TYPE) and (
           flag.type_start_token.type != Type.DOC_START_BRACE or
           flag.type_end_token.type != Type.DOC_END_BRACE):
         self._HandleError(errors.MISSING_BRACES_AROUND_TYPE,
@@ -250,7 +257,7 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
     type = token.type
 
     # Process the line change.
-    if not self._is_html and error_check.ShouldCheck(Rule.INDENTATION):
+    if not self._is_html and self._options.ShouldCheck(Rule.INDENTATION):
       # TODO(robbyw): Support checking indentation in HTML files.
       indentation_errors = self._indentation.CheckToken(token, state)
       for indentation_error in indentation_errors:
@@ -462,7 +469,7 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
                 'Invalid suppression type: %s' % suppress_type,
                 token)
 
-      elif (error_check.ShouldCheck(Rule.WELL_FORMED_AUTHOR) and
+      elif (self._options.ShouldCheck(Rule.WELL_FORMED_AUTHOR) and
             flag.flag_type == 'author'):
         # TODO(user): In non strict mode check the author tag for as much as
         # it exists, though the full form checked below isn't required.
@@ -553,11 +560,11 @@ class EcmaScriptLintRules(checkerbase.LintRulesBase):
 
     if type in (Type.DOC_FLAG, Type.DOC_INLINE_FLAG):
         if (token.values['name'] not in state.GetDocFlag().LEGAL_DOC and
-            token.values['name'] not in FLAGS.custom_jsdoc_tags):
+            token.values['name'] not in self._options.custom_jsdoc_tags):
           self._HandleError(errors.INVALID_JSDOC_TAG,
               'Invalid JsDoc tag: %s' % token.values['name'], token)
 
-        if (error_check.ShouldCheck(Rule.NO_BRACES_AROUND_INHERIT_DOC) and
+        if (self._options.ShouldCheck(Rule.NO_BRACES_AROUND_INHERIT_DOC) and
             token.values['name'] == 'inheritDoc' and
             type == Type.DOC_INLINE_FLAG):
           self._HandleError(errors.UNNECESSARY_BRACES_AROUND_INHERIT_DOC,
@@ -21,6 +21,7 @@
 
 __author__ = 'robbyw@google.com (Robert Walker)'
 
+import logging
 import re
 
 import gflags as flags
@@ -47,6 +48,8 @@ INVERTED_AUTHOR_SPEC = re.compile(r'(?P<leading_whitespace>\s*)'
                                   '\)'
                                   '(?P<trailing_characters>.*)')
 
+_LOGGER = logging.getLogger(__name__)
+
 FLAGS = flags.FLAGS
 flags.DEFINE_boolean('disable_indentation_fixing', False,
                      'Whether to disable automatic fixing of indentation.')
@@ -55,18 +58,21 @@ flags.DEFINE_boolean('disable_indentation_fixing', False,
 class ErrorFixer(errorhandler.ErrorHandler):
   """Object that fixes simple style errors."""
 
-  def __init__(self, external_file=None):
+  def __init__(self, external_file=None, options=None):
     """Initialize the error fixer.
 
     Args:
       external_file: If included, all output will be directed to this file
           instead of overwriting the files the errors are found in.
+      options: If included, the lintoptions.LintOptions to fix with instead of
+          the flags.
     """
     errorhandler.ErrorHandler.__init__(self)
 
     self._file_name = None
     self._file_token = None
     self._external_file = external_file
+    self._options = options
 
   def HandleFile(self, filename, first_token):
     """Notifies this ErrorPrinter that subsequent errors are in filename.
@@ -78,6 +84,10 @@ class ErrorFixer(errorhandler.ErrorHandler):
     self._file_name = filename
     self._file_token = first_token
     self._file_fix_count = 0
+    if self._options:
+      self._fix_indentation = not self._options.disable_indentation_fixing
+    else:
+      self._fix_indentation = not FLAGS.disable_indentation_fixing
     self._file_changed_lines = set()
 
   def _AddFix(self, tokens):
@@ -302,8 +312,7 @@ class ErrorFixer(errorhandler.ErrorHandler):
                                          match.group('trailing_characters'))
         self._AddFix(token)
 
-    elif (code == errors.WRONG_INDENTATION and
-          not FLAGS.disable_indentation_fixing):
+    elif code == errors.WRONG_INDENTATION and self._fix_indentation:
       token = tokenutil.GetFirstTokenInSameLine(token)
       actual = error.position.start
       expected = error.position.length
@@ -468,7 +477,8 @@ class ErrorFixer(errorhandler.ErrorHandler):
         if token.IsLastInLine():
           f.write('\n')
           if char_count > 80 and token.line_number in self._file_changed_lines:
-            print 'WARNING: Line %d of %s is now longer than 80 characters.' % (
+            _LOGGER.warning(
+                'WARNING: Line %d of %s is now longer than 80 characters.',
                 token.line_number, self._file_name)
 
           char_count = 0
@@ -22,7 +22,12 @@
 
 import unittest as googletest
 from closure_linter import error_fixer
+from closure_linter import errors
+from closure_linter import javascriptstatetracker
+from closure_linter import javascripttokens
 from closure_linter import testutil
+from closure_linter import tokenutil
+from closure_linter.common import error
 
 
 class ErrorFixerTest(googletest.TestCase):
@@ -49,9 +54,41 @@ class ErrorFixerTest(googletest.TestCase):
 
     self.assertEqual(fourth_token, self.error_fixer._file_token)
 
+  def testFixMissingBracesAroundType(self):
+    start_token = testutil.TokenizeSourceAndRunEcmaPass(_UNBRACED_TYPE_SCRIPT)
+    flag_token = tokenutil.Search(start_token,
+                                  javascripttokens.JavaScriptTokenType.DOC_FLAG)
+    flag_token.attached_object = javascriptstatetracker.JsDocFlag(flag_token)
+    self.error_fixer.HandleFile('test_file', start_token)
+
+    self.error_fixer.HandleError(error.Error(
+        errors.MISSING_BRACES_AROUND_TYPE, 'Missing braces', flag_token))
+
+    self.assertEqual(_BRACED_TYPE_SCRIPT.rstrip(),
+                     tokenutil.TokensToString(self._Tokens(start_token)))
+
+  def _Tokens(self, token):
+    while token:
+      yield token
+      token = token.next
+
 _TEST_SCRIPT = """\
 var x = 3;
 """
 
+_UNBRACED_TYPE_SCRIPT = """\
+/**
+ * @type RegExp
+ */
+var x = /a/;
+"""
+
+_BRACED_TYPE_SCRIPT = """\
+/**
+ * @type {RegExp}
+ */
+var x = /a/;
+"""
+
 if __name__ == '__main__':
   googletest.main()
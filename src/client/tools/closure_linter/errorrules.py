@@ -27,6 +27,15 @@ flags.DEFINE_boolean('jsdoc', True,
                      'Whether to report errors for missing JsDoc.')
 
 
+# Errors for missing documentation, only reported when the jsdoc flag is set.
+MISSING_DOC_ERRORS = frozenset([
+    errors.MISSING_PARAMETER_DOCUMENTATION,
+    errors.MISSING_RETURN_DOCUMENTATION,
+    errors.MISSING_MEMBER_DOCUMENTATION,
+    errors.MISSING_PRIVATE,
+    errors.MISSING_JSDOC_TAG_THIS])
+
+
 def ShouldReportError(error):
   """Whether the given error should be reported.
   
@@ -34,9 +43,4 @@ def ShouldReportError(error):
     True for all errors except missing documentation errors.  For these,
     it returns the value of the jsdoc flag.
   """
-  return FLAGS.jsdoc or error not in (
-      errors.MISSING_PARAMETER_DOCUMENTATION,
-      errors.MISSING_RETURN_DOCUMENTATION,
-      errors.MISSING_MEMBER_DOCUMENTATION,
-      errors.MISSING_PRIVATE,
-      errors.MISSING_JSDOC_TAG_THIS)
+  return FLAGS.jsdoc or error not in MISSING_DOC_ERRORS
@@ -19,6 +19,7 @@
 
 __author__ = 'robbyw@google.com (Robert Walker)'
 
+import logging
 import sys
 
 import gflags as flags
@@ -42,6 +43,9 @@ def main(argv = None):
   if argv is None:
     argv = flags.FLAGS(sys.argv)
 
+  # Print the warnings and internal errors of the linter
+  logging.basicConfig(format='%(message)s')
+
   suffixes = ['.js']
   if FLAGS.additional_extensions:
     suffixes += ['.%s' % ext for ext in FLAGS.additional_extensions]
@@ -49,10 +53,11 @@ def main(argv = None):
   files = fileflags.GetFileList(argv, 'JavaScript', suffixes)
 
   fixer = error_fixer.ErrorFixer()
+  session = runner.LintSession()
 
   # Check the list of files.
   for filename in files:
-    runner.Run(filename, fixer)
+    session.Run(filename, fixer)
 
 
 if __name__ == '__main__':
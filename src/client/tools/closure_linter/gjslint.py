@@ -39,6 +39,7 @@ __author__ = ('robbyw@google.com (Robert Walker)',
 
 import errno
 import itertools
+import logging
 import platform
 import sys
 import time
@@ -81,6 +82,10 @@ flags.DEFINE_boolean('multiprocess',
 GJSLINT_ONLY_FLAGS = ['--unix_mode', '--beep', '--nobeep', '--time',
                       '--check_html', '--summary']
 
+# The lint session of this process, created on first use.  Each worker of the
+# multiprocessing pool builds its own.
+_lint_session = None
+
 
 def _MultiprocessCheckPaths(paths):
   """Run _CheckPath over mutltiple processes.
@@ -140,8 +145,12 @@ def _CheckPath(path):
     A list of errorrecord.ErrorRecords for any found errors.
   """
 
+  global _lint_session
+  if _lint_session is None:
+    _lint_session = runner.LintSession()
+
   error_handler = erroraccumulator.ErrorAccumulator()
-  runner.Run(path, error_handler)
+  _lint_session.Run(path, error_handler)
 
   make_error_record = lambda err: errorrecord.MakeErrorRecord(path, err)
   return map(make_error_record, error_handler.GetErrors())
@@ -237,6 +246,9 @@ def main(argv = None):
   if argv is None:
     argv = flags.FLAGS(sys.argv)
 
+  # Print the warnings and internal errors of the linter
+  logging.basicConfig(format='%(message)s')
+
   if FLAGS.time:
     start_time = time.time()
 
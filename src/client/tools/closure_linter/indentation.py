@@ -54,6 +54,10 @@ Type = javascripttokens.JavaScriptTokenType
 #    allowable indentations for each stack.  We follows the general
 #    "no false positives" approach of GJsLint and build the most permissive
 #    set possible.
+#
+#    The allowable indentations are computed incrementally: the state after
+#    each stack entry is cached, so only entries pushed (or changed) since the
+#    last first-in-line token need to be folded in.
 
 
 class TokenInfo(object):
@@ -110,10 +114,24 @@ class IndentationRules(object):
   other Ecma like scripting languages.
   """
 
-  def __init__(self):
-    """Initializes the IndentationRules checker."""
+  def __init__(self, debug=False):
+    """Initializes the IndentationRules checker.
+
+    Args:
+      debug: Whether to print debugging information for indentation.
+    """
+    self._debug = debug
+    self.Reset()
+
+  def Reset(self):
+    """Resets the internal state to prepare for checking a new file."""
     self._stack = []
 
+    # Running (expected, hard_stops, in_same_continuation) state after each
+    # entry of the stack.  Only the first len(self._allowable) entries are up
+    # to date; the rest are recomputed on demand.
+    self._allowable = []
+
     # Map from line number to number of characters it is off in indentation.
     self._start_index_offset = {}
 
@@ -121,6 +139,7 @@ class IndentationRules(object):
     if self._stack:
       old_stack = self._stack
       self._stack = []
+      self._allowable = []
       raise Exception("INTERNAL ERROR: indentation stack is not empty: %r" %
                       old_stack)
 
@@ -196,7 +215,7 @@ class IndentationRules(object):
     not_dot = token.string != '.'
     if is_first and not_binary_operator and not_dot and token.type not in (
         Type.COMMENT, Type.DOC_PREFIX, Type.STRING_TEXT):
-      if flags.FLAGS.debug_indentation:
+      if self._debug:
         print 'Line #%d: stack %r' % (token.line_number, stack)
 
       # Ignore lines that start in JsDoc since we don't check them properly yet.
@@ -227,6 +246,7 @@ class IndentationRules(object):
             token,
             Position(actual, expected[0])])
         self._start_index_offset[token.line_number] = expected[0] - actual
+        self._InvalidateLine(token.line_number)
 
     # Add tokens that could increase indentation.
     if token_type == Type.START_BRACKET:
@@ -334,59 +354,105 @@ class IndentationRules(object):
     Returns:
       The set of allowable indentations, given the current stack.
     """
-    expected = set([0])
-    hard_stops = set([])
-
-    # Whether the tokens are still in the same continuation, meaning additional
-    # indentation is optional.  As an example:
-    # x = 5 +
-    #     6 +
-    #     7;
-    # The second '+' does not add any required indentation.
-    in_same_continuation = False
-
-    for token_info in self._stack:
-      token = token_info.token
-
-      # Handle normal additive indentation tokens.
-      if not token_info.overridden_by and token.string != 'return':
-        if token_info.is_block:
-          expected = self._AddToEach(expected, 2)
-          hard_stops = self._AddToEach(hard_stops, 2)
-          in_same_continuation = False
-        elif in_same_continuation:
-          expected |= self._AddToEach(expected, 4)
-          hard_stops |= self._AddToEach(hard_stops, 4)
-        else:
-          expected = self._AddToEach(expected, 4)
-          hard_stops |= self._AddToEach(hard_stops, 4)
-          in_same_continuation = True
+    allowable = self._allowable
+    if allowable:
+      expected, hard_stops, in_same_continuation = allowable[-1]
+    else:
+      expected = frozenset([0])
+      hard_stops = frozenset()
+      # Whether the tokens are still in the same continuation, meaning
+      # additional indentation is optional.  As an example:
+      # x = 5 +
+      #     6 +
+      #     7;
+      # The second '+' does not add any required indentation.
+      in_same_continuation = False
+
+    for token_info in self._stack[len(allowable):]:
+      expected, hard_stops, in_same_continuation = self._ApplyTokenInfo(
+          token_info, expected, hard_stops, in_same_continuation)
+      allowable.append((expected, hard_stops, in_same_continuation))
+
+    return set(expected | hard_stops) or set([0])
+
+  def _ApplyTokenInfo(self, token_info, expected, hard_stops,
+                      in_same_continuation):
+    """Folds a single stack entry into the running allowable indentations.
 
-      # Handle hard stops after (, [, return, =, and ?
-      if self._IsHardStop(token):
-        override_is_hard_stop = (token_info.overridden_by and
-            self._IsHardStop(token_info.overridden_by.token))
-        if not override_is_hard_stop:
-          start_index = token.start_index
-          if token.line_number in self._start_index_offset:
-            start_index += self._start_index_offset[token.line_number]
-          if (token.type in (Type.START_PAREN, Type.START_PARAMETERS) and
-              not token_info.overridden_by):
-            hard_stops.add(start_index + 1)
+    Args:
+      token_info: The stack entry to apply.
+      expected: The frozenset of expected indentations so far.
+      hard_stops: The frozenset of hard stop indentations so far.
+      in_same_continuation: Whether the previous entries are in the same
+        continuation.
 
-          elif token.string == 'return' and not token_info.overridden_by:
-            hard_stops.add(start_index + 7)
+    Returns:
+      A tuple of the new expected, hard_stops and in_same_continuation values.
+    """
+    token = token_info.token
+
+    # Handle normal additive indentation tokens.
+    if not token_info.overridden_by and token.string != 'return':
+      if token_info.is_block:
+        expected = self._AddToEach(expected, 2)
+        hard_stops = self._AddToEach(hard_stops, 2)
+        in_same_continuation = False
+      elif in_same_continuation:
+        expected |= self._AddToEach(expected, 4)
+        hard_stops |= self._AddToEach(hard_stops, 4)
+      else:
+        expected = self._AddToEach(expected, 4)
+        hard_stops |= self._AddToEach(hard_stops, 4)
+        in_same_continuation = True
+
+    # Handle hard stops after (, [, return, =, and ?
+    if self._IsHardStop(token):
+      override_is_hard_stop = (token_info.overridden_by and
+          self._IsHardStop(token_info.overridden_by.token))
+      if not override_is_hard_stop:
+        start_index = token.start_index
+        if token.line_number in self._start_index_offset:
+          start_index += self._start_index_offset[token.line_number]
+        hard_stop = None
+        if (token.type in (Type.START_PAREN, Type.START_PARAMETERS) and
+            not token_info.overridden_by):
+          hard_stop = start_index + 1
 
-          elif (token.type == Type.START_BRACKET):
-            hard_stops.add(start_index + 1)
+        elif token.string == 'return' and not token_info.overridden_by:
+          hard_stop = start_index + 7
 
-          elif token.IsAssignment():
-            hard_stops.add(start_index + len(token.string) + 1)
+        elif (token.type == Type.START_BRACKET):
+          hard_stop = start_index + 1
 
-          elif token.IsOperator('?') and not token_info.overridden_by:
-            hard_stops.add(start_index + 2)
+        elif token.IsAssignment():
+          hard_stop = start_index + len(token.string) + 1
 
-    return (expected | hard_stops) or set([0])
+        elif token.IsOperator('?') and not token_info.overridden_by:
+          hard_stop = start_index + 2
+
+        if hard_stop is not None:
+          hard_stops = hard_stops | frozenset([hard_stop])
+
+    return frozenset(expected), frozenset(hard_stops), in_same_continuation
+
+  def _Invalidate(self, index):
+    """Drops the cached allowable indentations from the given stack index on.
+
+    Args:
+      index: The index of the first stack entry whose state changed.
+    """
+    del self._allowable[index:]
+
+  def _InvalidateLine(self, line_number):
+    """Drops cached allowable indentations for entries on the given line.
+
+    Args:
+      line_number: The line whose start index offset changed.
+    """
+    for index, stack_info in enumerate(self._stack[:len(self._allowable)]):
+      if stack_info.token.line_number == line_number:
+        self._Invalidate(index)
+        return
 
   def _GetActualIndentation(self, token):
     """Gets the actual indentation of the line containing the given token.
@@ -469,6 +535,7 @@ class IndentationRules(object):
           # In general, tokens only override each other when they are on
           # the same line.
           stack_info.overridden_by = token_info
+          self._Invalidate(len(self._stack) - index)
           if (token_info.token.type == Type.START_BLOCK and
               (stack_token.IsAssignment() or
                stack_token.type in (Type.IDENTIFIER, Type.START_PAREN))):
@@ -492,6 +559,7 @@ class IndentationRules(object):
           # override should still apply.
           stack_info.overridden_by = token_info
           stack_info.is_permanent_override = True
+          self._Invalidate(len(self._stack) - index)
         else:
           break
         index += 1
@@ -505,32 +573,47 @@ class IndentationRules(object):
       The popped token info.
     """
     token_info = self._stack.pop()
+    self._Invalidate(len(self._stack))
     if token_info.token.type not in (Type.START_BLOCK, Type.START_BRACKET):
       # Remove any temporary overrides.
       self._RemoveOverrides(token_info)
-    else:
+    elif self._IsClosedOnSameLine(token_info.token):
       # For braces and brackets, which can be object and array literals, remove
       # overrides when the literal is closed on the same line.
-      token_check = token_info.token
-      same_type = token_check.type
-      goal_type = None
-      if token_info.token.type == Type.START_BRACKET:
-        goal_type = Type.END_BRACKET
-      else:
-        goal_type = Type.END_BLOCK
-      line_number = token_info.token.line_number
-      count = 0
-      while token_check and token_check.line_number == line_number:
-        if token_check.type == goal_type:
-          count -= 1
-          if not count:
-            self._RemoveOverrides(token_info)
-            break
-        if token_check.type == same_type:
-          count += 1
-        token_check = token_check.next
+      self._RemoveOverrides(token_info)
     return token_info
 
+  def _IsClosedOnSameLine(self, start_token):
+    """Determines if a brace or bracket is closed on the line it opens.
+
+    Args:
+      start_token: The START_BLOCK or START_BRACKET token.
+
+    Returns:
+      True if the matching end token is on the same line as start_token.
+    """
+    end_token = start_token.metadata.context.end_token
+    if end_token:
+      return end_token.line_number == start_token.line_number
+
+    # The metadata pass did not find a match, so scan the line ourselves.
+    token_check = start_token
+    same_type = start_token.type
+    if same_type == Type.START_BRACKET:
+      goal_type = Type.END_BRACKET
+    else:
+      goal_type = Type.END_BLOCK
+    count = 0
+    while token_check and token_check.line_number == start_token.line_number:
+      if token_check.type == goal_type:
+        count -= 1
+        if not count:
+          return True
+      if token_check.type == same_type:
+        count += 1
+      token_check = token_check.next
+    return False
+
   def _PopToImpliedBlock(self):
     """Pops the stack until an implied block token is found."""
     while not self._Pop().token.metadata.is_implied_block:
@@ -558,10 +641,11 @@ class IndentationRules(object):
     Args:
       token_info: The token that is being removed from the stack.
     """
-    for stack_token in self._stack:
+    for index, stack_token in enumerate(self._stack):
       if (stack_token.overridden_by == token_info and
           not stack_token.is_permanent_override):
         stack_token.overridden_by = None
+        self._Invalidate(index)
 
   def _PopTransient(self):
     """Pops all transient tokens - i.e. not blocks, literals, or parens."""
@@ -46,14 +46,31 @@ Type = javascripttokens.JavaScriptTokenType
 class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
   """JavaScript lint rules that catch JavaScript specific style errors."""
 
-  def __init__(self, namespaces_info):
-    """Initializes a JavaScriptLintRules instance."""
-    ecmalintrules.EcmaScriptLintRules.__init__(self)
+  def __init__(self, namespaces_info, options=None):
+    """Initializes a JavaScriptLintRules instance.
+
+    Args:
+      namespaces_info: ClosurizedNamespacesInfo to check requires and provides
+        with, or None.
+      options: The lintoptions.LintOptions to check with.  Defaults to options
+        built from the flags.
+    """
+    ecmalintrules.EcmaScriptLintRules.__init__(self, options)
     self._namespaces_info = namespaces_info
     self._declared_private_member_tokens = {}
     self._declared_private_members = set()
     self._used_private_members = set()
 
+  def Initialize(self, checker, limited_doc_checks, is_html):
+    """Initialize this lint rule object before parsing a new file."""
+    ecmalintrules.EcmaScriptLintRules.Initialize(self, checker,
+                                                 limited_doc_checks, is_html)
+    # Clear state left over from the previous file, which Finalize does not
+    # get to when a file fails to parse.
+    self._declared_private_member_tokens = {}
+    self._declared_private_members = set()
+    self._used_private_members = set()
+
   def HandleMissingParameterDoc(self, token, param_name):
     """Handle errors associated with a parameter missing a param tag."""
     self._HandleError(errors.MISSING_PARAMETER_DOCUMENTATION,
@@ -95,7 +112,7 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
     # Store some convenience variables
     namespaces_info = self._namespaces_info
 
-    if error_check.ShouldCheck(Rule.UNUSED_PRIVATE_MEMBERS):
+    if self._options.ShouldCheck(Rule.UNUSED_PRIVATE_MEMBERS):
       # Find all assignments to private members.
       if token.type == Type.SIMPLE_LVALUE:
         identifier = token.string
@@ -137,7 +154,7 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
         self._CheckForMissingSpaceBeforeToken(
             token.attached_object.name_token)
 
-        if (error_check.ShouldCheck(Rule.OPTIONAL_TYPE_MARKER) and
+        if (self._options.ShouldCheck(Rule.OPTIONAL_TYPE_MARKER) and
             flag.type is not None and flag.name is not None):
           # Check for optional marker in type.
           if (flag.type.endswith('=') and
@@ -191,7 +208,7 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
       if doc_comment.HasFlag('fileoverview') and doc_comment.HasFlag('externs'):
         self._SetLimitedDocChecks(True)
 
-      if (error_check.ShouldCheck(Rule.BLANK_LINES_AT_TOP_LEVEL) and
+      if (self._options.ShouldCheck(Rule.BLANK_LINES_AT_TOP_LEVEL) and
           not self._is_html and
           state.InTopLevel() and
           not state.InNonScopeBlock()):
@@ -474,7 +491,7 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
     # Call the base class's Finalize function.
     super(JavaScriptLintRules, self).Finalize(state)
 
-    if error_check.ShouldCheck(Rule.UNUSED_PRIVATE_MEMBERS):
+    if self._options.ShouldCheck(Rule.UNUSED_PRIVATE_MEMBERS):
       # Report an error for any declared private member that was never used.
       unused_private_members = (self._declared_private_members -
                                 self._used_private_members)
@@ -485,11 +502,6 @@ class JavaScriptLintRules(ecmalintrules.EcmaScriptLintRules):
                           'Unused private member: %s.' % token.string,
                           token)
 
-      # Clear state to prepare for the next file.
-      self._declared_private_member_tokens = {}
-      self._declared_private_members = set()
-      self._used_private_members = set()
-
     namespaces_info = self._namespaces_info
     if namespaces_info is not None:
       # If there are no provide or require statements, missing provides and
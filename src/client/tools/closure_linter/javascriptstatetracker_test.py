@@ -124,6 +124,35 @@ class CommentTest(googletest.TestCase):
         'Comment targeting goog.foo.\n\nThis is the second line.',
         comment.description)
 
+  def testGetDocFlags(self):
+    comment = self._ParseComment("""
+        /**
+         * @param {number} foo The count of foo.
+         * @return {string} The bar.
+         */
+        target;""")
+
+    param, ret = comment.GetDocFlags()
+
+    # Flag details are only parsed on first access.
+    self.assertFalse(param._type_parsed)
+    self.assertFalse(param._name_parsed)
+    self.assertFalse(param._description_parsed)
+
+    self.assertEquals('param', param.flag_type)
+    self.assertEquals('foo', param.name)
+    self.assertTrue(param._type_parsed)
+    self.assertEquals('number', param.type)
+    self.assertEquals('{', param.type_start_token.string)
+    self.assertEquals('}', param.type_end_token.string)
+    self.assertEquals('The count of foo.', param.description.strip())
+
+    self.assertEquals('return', ret.flag_type)
+    self.assertEquals('The bar.', ret.description.strip())
+    self.assertEquals('string', ret.type)
+    self.assertIsNone(ret.name)
+    self.assertIsNone(ret.name_token)
+
   def testCommentGetTarget(self):
     self.assertCommentTarget('goog.foo', """
         /**
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+#
+# Copyright 2013 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Library interface for linting and fixing in-memory JavaScript sources.
+
+Unlike gjslint and fixjsstyle, this interface never reads the global flags,
+never touches the disk and prints nothing, so it can be embedded in long
+running processes.  Warnings and internal errors go to the 'closure_linter'
+logger:
+
+  linter = lintapi.Linter(lintoptions.LintOptions(strict=True))
+  for err in linter.Check(source, 'generated.js'):
+    print '%d: %s' % (err.line_number, err.message)
+  fixed_source = linter.Fix(source, 'generated.js')
+"""
+
+import StringIO
+import threading
+
+from closure_linter import error_fixer
+from closure_linter import errors
+from closure_linter import lintoptions
+from closure_linter import runner
+from closure_linter.common import erroraccumulator
+
+
+class LintError(object):
+  """A lint error, detached from the token stream it was found in.
+
+  Attributes:
+    code: The numeric error code (see errors.py).
+    message: The error message.
+    line_number: The line the error was found on, or None for file-wide
+      errors.
+    start_index: The column the error starts at.
+    new_error: Whether this is a "new error" (see errors.NEW_ERRORS).
+  """
+
+  def __init__(self, code, message, line_number, start_index, new_error):
+    self.code = code
+    self.message = message
+    self.line_number = line_number
+    self.start_index = start_index
+    self.new_error = new_error
+
+  def __repr__(self):
+    return '<LintError: %s (%d): %s>' % (self.line_number, self.code,
+                                         self.message)
+
+
+def _MakeLintError(err):
+  """Converts an error.Error to a LintError.
+
+  Args:
+    err: The error.Error instance.
+
+  Returns:
+    The LintError instance.
+  """
+  line_number = None
+  if err.token:
+    line_number = err.token.line_number
+  return LintError(err.code, err.message, line_number, err.start_index,
+                   err.code in errors.NEW_ERRORS)
+
+
+def _ReadSource(source):
+  """Returns the given source string or file-like object as a string."""
+  if isinstance(source, basestring):
+    return source
+  return ''.join(source)
+
+
+class Linter(object):
+  """Lints and fixes in-memory sources with an explicit set of options.
+
+  A Linter may be shared between threads; each thread lazily gets its own
+  runner.LintSession, which is reused for every source it checks.
+  """
+
+  def __init__(self, options=None):
+    """Initializes a Linter.
+
+    Args:
+      options: The lintoptions.LintOptions to check with.  Defaults to
+        lintoptions.LintOptions().
+    """
+    self._options = options or lintoptions.LintOptions()
+    self._local = threading.local()
+
+  def _GetSession(self):
+    """Returns the lint session of the current thread."""
+    session = getattr(self._local, 'session', None)
+    if session is None:
+      session = runner.LintSession(self._options)
+      self._local.session = session
+    return session
+
+  def Check(self, source, filename='input.js'):
+    """Lints a source.
+
+    Args:
+      source: The source as a string or a file-like object (iterates lines).
+      filename: The name to report the source as.  It decides whether the
+        source is treated as HTML and whether documentation checks are
+        limited, but is never opened.
+
+    Returns:
+      A list of LintErrors, in the order they were found.
+    """
+    source = _ReadSource(source)
+    error_handler = erroraccumulator.ErrorAccumulator()
+    self._GetSession().Run(filename, error_handler,
+                           StringIO.StringIO(source))
+    return [_MakeLintError(err) for err in error_handler.GetErrors()]
+
+  def Fix(self, source, filename='input.js'):
+    """Fixes the auto-fixable errors in a source.
+
+    Args:
+      source: The source as a string or a file-like object (iterates lines).
+      filename: The name to report the source as.  It is never opened.
+
+    Returns:
+      The fixed source as a string.  It is the original source if there was
+      nothing to fix.
+    """
+    source = _ReadSource(source)
+    output = StringIO.StringIO()
+    fixer = error_fixer.ErrorFixer(output, self._options)
+    self._GetSession().Run(filename, fixer, StringIO.StringIO(source))
+    return output.getvalue() or source
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Copyright 2013 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Unit tests for the lintapi module."""
+
+import logging
+import StringIO
+import sys
+import threading
+import unittest as googletest
+
+from closure_linter import errors
+from closure_linter import lintapi
+from closure_linter import lintoptions
+
+
+_GOOD_SCRIPT = """\
+var a = 3;
+"""
+
+_BAD_SCRIPT = """\
+var a = 3
+var b  = function(c) {
+    return a + c;
+};
+"""
+
+_FIXED_SCRIPT = """\
+var a = 3;
+var b = function(c) {
+  return a + c;
+};
+"""
+
+# Exactly 80 characters, the fixed semicolon makes it too long
+_LONG_SCRIPT = """\
+var a = '%s'
+""" % ('x' * 70)
+
+
+class LinterTest(googletest.TestCase):
+
+  def testCheck(self):
+    linter = lintapi.Linter()
+
+    self.assertEquals([], linter.Check(_GOOD_SCRIPT))
+
+    codes = [(err.line_number, err.code) for err in linter.Check(_BAD_SCRIPT)]
+    self.assertEquals([(1, errors.MISSING_SEMICOLON),
+                       (2, errors.EXTRA_SPACE)], codes)
+
+  def testCheckFileObject(self):
+    linter = lintapi.Linter()
+    self.assertEquals(
+        2, len(linter.Check(StringIO.StringIO(_BAD_SCRIPT), 'bad.js')))
+
+  def testOptions(self):
+    linter = lintapi.Linter(lintoptions.LintOptions(strict=True))
+    codes = [err.code for err in linter.Check(_BAD_SCRIPT)]
+    self.assertIn(errors.WRONG_INDENTATION, codes)
+
+  def testFix(self):
+    linter = lintapi.Linter(lintoptions.LintOptions(strict=True))
+    self.assertEquals(_FIXED_SCRIPT, linter.Fix(_BAD_SCRIPT))
+    self.assertEquals(_GOOD_SCRIPT, linter.Fix(_GOOD_SCRIPT))
+
+  def testFixPrintsNothing(self):
+    linter = lintapi.Linter()
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('closure_linter')
+    logger.addHandler(handler)
+    stdout = sys.stdout
+    sys.stdout = StringIO.StringIO()
+    try:
+      self.assertEquals(_LONG_SCRIPT[:-1] + ';\n', linter.Fix(_LONG_SCRIPT))
+      self.assertEquals('', sys.stdout.getvalue())
+    finally:
+      sys.stdout = stdout
+      logger.removeHandler(handler)
+
+    self.assertEquals(1, len(records))
+    self.assertIn('longer than 80 characters', records[0].getMessage())
+
+  def testThreads(self):
+    linter = lintapi.Linter()
+    results = []
+
+    def CheckBadScript():
+      results.append(len(linter.Check(_BAD_SCRIPT)))
+
+    threads = [threading.Thread(target=CheckBadScript) for _ in xrange(4)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    self.assertEquals([2, 2, 2, 2], results)
+
+
+if __name__ == '__main__':
+  googletest.main()
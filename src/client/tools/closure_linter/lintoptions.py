@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+#
+# Copyright 2013 The Closure Linter Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS-IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Options controlling what the linter checks, independent of gflags."""
+
+import gflags as flags
+
+from closure_linter import error_check
+from closure_linter import errorrules
+
+# Shorthand
+Rule = error_check.Rule
+
+DEFAULT_LIMITED_DOC_FILES = ('dummy.js', 'externs.js')
+
+
+class LintOptions(object):
+  """Immutable set of options for a lint run.
+
+  The command line tools build one from the flags with FromFlags.  Library
+  users can build one directly, which avoids any use of the global flags.
+
+  Attributes:
+    strict: Whether to validate against the stricter Closure style.
+    jslint_error: Frozenset of optional rules (see error_check.Rule) to check.
+    jsdoc: Whether to report errors for missing JsDoc.
+    custom_jsdoc_tags: Frozenset of extra jsdoc tags to allow.
+    closurized_namespaces: Tuple of namespace prefixes to check
+      goog.provide/goog.require statements for.
+    ignored_extra_namespaces: Tuple of namespaces never reported as extra.
+    limited_doc_files: Tuple of filename suffixes with relaxed documentation
+      checks.
+    error_trace: Whether to log the tracebacks of parse errors.
+    debug_indentation: Whether to print indentation debugging information.
+    disable_indentation_fixing: Whether the fixer leaves indentation alone.
+  """
+
+  def __init__(self, strict=False, jslint_error=(), jsdoc=True,
+               custom_jsdoc_tags=(), closurized_namespaces=(),
+               ignored_extra_namespaces=(),
+               limited_doc_files=DEFAULT_LIMITED_DOC_FILES,
+               error_trace=False, debug_indentation=False,
+               disable_indentation_fixing=False):
+    self.strict = strict
+    self.jslint_error = frozenset(jslint_error)
+    self.jsdoc = jsdoc
+    self.custom_jsdoc_tags = frozenset(custom_jsdoc_tags)
+    self.closurized_namespaces = tuple(closurized_namespaces)
+    self.ignored_extra_namespaces = tuple(ignored_extra_namespaces)
+    self.limited_doc_files = tuple(limited_doc_files)
+    self.error_trace = error_trace
+    self.debug_indentation = debug_indentation
+    self.disable_indentation_fixing = disable_indentation_fixing
+
+    if Rule.ALL in self.jslint_error:
+      self._checked_rules = None
+    else:
+      self._checked_rules = set(self.jslint_error)
+      if strict:
+        self._checked_rules |= Rule.CLOSURE_RULES
+
+  def ShouldCheck(self, rule):
+    """Returns whether the optional rule should be checked.
+
+    Args:
+      rule: Name of the rule (see error_check.Rule).
+
+    Returns:
+      True if the rule should be checked according to the options.
+    """
+    return self._checked_rules is None or rule in self._checked_rules
+
+  def ShouldReportError(self, code):
+    """Returns whether the given error should be reported.
+
+    Args:
+      code: The error code.
+
+    Returns:
+      True for all errors except missing documentation errors.  For these,
+      it returns the value of the jsdoc option.
+    """
+    return self.jsdoc or code not in errorrules.MISSING_DOC_ERRORS
+
+
+def _GetFlag(name, default):
+  """Returns the value of the named flag, or default if it is not defined."""
+  if name in flags.FLAGS:
+    return flags.FLAGS[name].value
+  return default
+
+
+def FromFlags():
+  """Builds a LintOptions object from the current flag values.
+
+  Flags defined by modules that were never imported take their default value.
+
+  Returns:
+    The LintOptions object.
+  """
+  return LintOptions(
+      strict=_GetFlag('strict', False),
+      jslint_error=_GetFlag('jslint_error', None) or (),
+      jsdoc=_GetFlag('jsdoc', True),
+      custom_jsdoc_tags=_GetFlag('custom_jsdoc_tags', None) or (),
+      closurized_namespaces=_GetFlag('closurized_namespaces', None) or (),
+      ignored_extra_namespaces=_GetFlag('ignored_extra_namespaces', None) or (),
+      limited_doc_files=_GetFlag('limited_doc_files',
+                                 DEFAULT_LIMITED_DOC_FILES),
+      error_trace=_GetFlag('error_trace', False),
+      debug_indentation=_GetFlag('debug_indentation', False),
+      disable_indentation_fixing=_GetFlag('disable_indentation_fixing', False))
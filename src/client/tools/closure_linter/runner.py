@@ -20,7 +20,7 @@
 
 __author__ = 'nnaze@google.com (Nathan Naze)'
 
-import traceback
+import logging
 
 import gflags as flags
 
@@ -29,11 +29,14 @@ from closure_linter import ecmametadatapass
 from closure_linter import errors
 from closure_linter import javascriptstatetracker
 from closure_linter import javascripttokenizer
+from closure_linter import lintoptions
 
 from closure_linter.common import error
 from closure_linter.common import htmlutil
 from closure_linter.common import tokens
 
+_LOGGER = logging.getLogger(__name__)
+
 flags.DEFINE_list('limited_doc_files', ['dummy.js', 'externs.js'],
                   'List of files with relaxed documentation checks. Will not '
                   'report errors for missing documentation, some missing '
@@ -60,20 +63,6 @@ def _IsHtml(filename):
   return filename.endswith('.html') or filename.endswith('.htm')
 
 
-def _Tokenize(fileobj):
-  """Tokenize a file.
-
-  Args:
-    fileobj: file-like object (or iterable lines) with the source.
-
-  Returns:
-    The first token in the token stream and the ending mode of the tokenizer.
-  """
-  tokenizer = javascripttokenizer.JavaScriptTokenizer()
-  start_token = tokenizer.TokenizeFile(fileobj)
-  return start_token, tokenizer.mode
-
-
 def _IsLimitedDocCheck(filename, limited_doc_files):
   """Whether this this a limited-doc file.
 
@@ -94,56 +83,97 @@ def _IsLimitedDocCheck(filename, limited_doc_files):
 def Run(filename, error_handler, source=None):
   """Tokenize, run passes, and check the given file.
 
+  Builds a one-off LintSession.  Callers checking many files should create a
+  LintSession once and call its Run method for each file instead.
+
   Args:
     filename: The path of the file to check
     error_handler: The error handler to report errors to.
     source: A file-like object with the file source. If omitted, the file will
       be read from the filename path.
   """
-  if not source:
-    try:
-      source = open(filename)
-    except IOError:
-      error_handler.HandleFile(filename, None)
-      error_handler.HandleError(
-          error.Error(errors.FILE_NOT_FOUND, 'File not found'))
-      error_handler.FinishFile()
-      return
+  LintSession().Run(filename, error_handler, source)
 
-  if _IsHtml(filename):
-    source_file = htmlutil.GetScriptLines(source)
-  else:
-    source_file = source
 
-  token, tokenizer_mode = _Tokenize(source_file)
+class LintSession(object):
+  """Lints a sequence of files, reusing the linter objects between them.
 
-  error_handler.HandleFile(filename, token)
-
-  # If we did not end in the basic mode, this a failed parse.
-  if tokenizer_mode is not javascripttokenizer.JavaScriptModes.TEXT_MODE:
-    error_handler.HandleError(
-        error.Error(errors.FILE_IN_BLOCK,
-                    'File ended in mode "%s".' % tokenizer_mode,
-                    _GetLastNonWhiteSpaceToken(token)))
+  The options are read and the tokenizer, metadata pass, state tracker, lint
+  rules and namespace information are built once when the session is created.
+  Only their per-file state is reset for each file.  A session is not
+  thread-safe; each process (or thread) should hold its own.
+  """
 
-  # Run the ECMA pass
-  error_token = None
+  def __init__(self, options=None):
+    """Initializes a LintSession.
+
+    Args:
+      options: The lintoptions.LintOptions to check with.  Defaults to options
+        built from the flags.
+    """
+    self._options = options or lintoptions.FromFlags()
+    self._tokenizer = javascripttokenizer.JavaScriptTokenizer()
+    self._metadata_pass = ecmametadatapass.EcmaMetaDataPass()
+    self._style_checker = checker.JavaScriptStyleChecker(
+        state_tracker=javascriptstatetracker.JavaScriptStateTracker(),
+        error_handler=None,
+        options=self._options)
+
+  def Run(self, filename, error_handler, source=None):
+    """Tokenize, run passes, and check the given file.
+
+    Args:
+      filename: The path of the file to check
+      error_handler: The error handler to report errors to.
+      source: A file-like object with the file source. If omitted, the file
+        will be read from the filename path.
+    """
+    if not source:
+      try:
+        source = open(filename)
+      except IOError:
+        error_handler.HandleFile(filename, None)
+        error_handler.HandleError(
+            error.Error(errors.FILE_NOT_FOUND, 'File not found'))
+        error_handler.FinishFile()
+        return
+
+    if _IsHtml(filename):
+      source_file = htmlutil.GetScriptLines(source)
+    else:
+      source_file = source
+
+    token = self._tokenizer.TokenizeFile(source_file)
+    tokenizer_mode = self._tokenizer.mode
+
+    error_handler.HandleFile(filename, token)
+
+    # If we did not end in the basic mode, this a failed parse.
+    if tokenizer_mode is not javascripttokenizer.JavaScriptModes.TEXT_MODE:
+      error_handler.HandleError(
+          error.Error(errors.FILE_IN_BLOCK,
+                      'File ended in mode "%s".' % tokenizer_mode,
+                      _GetLastNonWhiteSpaceToken(token)))
 
-  ecma_pass = ecmametadatapass.EcmaMetaDataPass()
-  error_token = RunMetaDataPass(token, ecma_pass, error_handler, filename)
+    # Run the ECMA pass
+    self._metadata_pass.Reset()
+    error_token = RunMetaDataPass(token, self._metadata_pass, error_handler,
+                                  filename, self._options.error_trace)
 
-  is_limited_doc_check = (
-      _IsLimitedDocCheck(filename, flags.FLAGS.limited_doc_files))
+    is_limited_doc_check = (
+        _IsLimitedDocCheck(filename, self._options.limited_doc_files))
 
-  _RunChecker(token, error_handler,
-              is_limited_doc_check,
-              is_html=_IsHtml(filename),
-              stop_token=error_token)
+    self._style_checker.SetErrorHandler(error_handler)
+    self._style_checker.Check(token,
+                              is_html=_IsHtml(filename),
+                              limited_doc_checks=is_limited_doc_check,
+                              stop_token=error_token)
 
-  error_handler.FinishFile()
+    error_handler.FinishFile()
 
 
-def RunMetaDataPass(start_token, metadata_pass, error_handler, filename=''):
+def RunMetaDataPass(start_token, metadata_pass, error_handler, filename='',
+                    error_trace=None):
   """Run a metadata pass over a token stream.
 
   Args:
@@ -151,16 +181,20 @@ def RunMetaDataPass(start_token, metadata_pass, error_handler, filename=''):
     metadata_pass: Metadata pass to run.
     error_handler: The error handler to report errors to.
     filename: Filename of the source.
+    error_trace: Whether to log the traceback of parse errors.  Defaults to
+      the value of the error_trace flag.
 
   Returns:
     The token where the error occurred (if any).
   """
+  if error_trace is None:
+    error_trace = flags.FLAGS.error_trace
 
   try:
     metadata_pass.Process(start_token)
   except ecmametadatapass.ParseError, parse_err:
-    if flags.FLAGS.error_trace:
-      traceback.print_exc()
+    if error_trace:
+      _LOGGER.error('Error parsing %s', filename, exc_info=True)
     error_token = parse_err.token
     error_handler.HandleError(
         error.Error(errors.FILE_DOES_NOT_PARSE,
@@ -168,24 +202,8 @@ def RunMetaDataPass(start_token, metadata_pass, error_handler, filename=''):
                      'check the rest of file.' % error_token), error_token))
     return error_token
   except Exception:  # pylint: disable-msg=W0703
-    traceback.print_exc()
+    _LOGGER.exception('Internal error in %s', filename)
     error_handler.HandleError(
         error.Error(
             errors.FILE_DOES_NOT_PARSE,
             'Internal error in %s' % filename))
-
-
-def _RunChecker(start_token, error_handler,
-                limited_doc_checks, is_html,
-                stop_token=None):
-
-  state_tracker = javascriptstatetracker.JavaScriptStateTracker()
-
-  style_checker = checker.JavaScriptStyleChecker(
-      state_tracker=state_tracker,
-      error_handler=error_handler)
-
-  style_checker.Check(start_token,
-                      is_html=is_html,
-                      limited_doc_checks=limited_doc_checks,
-                      stop_token=stop_token)
@@ -28,6 +28,7 @@ import unittest as googletest
 from closure_linter import errors
 from closure_linter import runner
 from closure_linter.common import error
+from closure_linter.common import erroraccumulator
 from closure_linter.common import errorhandler
 from closure_linter.common import tokens
 
@@ -88,6 +89,35 @@ class RunnerTest(googletest.TestCase):
     self.mox.VerifyAll()
 
 
+class LintSessionTest(googletest.TestCase):
+
+  def _GetErrorCodes(self, session, filename, script):
+    error_handler = erroraccumulator.ErrorAccumulator()
+    session.Run(filename, error_handler, StringIO.StringIO(script))
+    return [err.code for err in error_handler.GetErrors()]
+
+  def testReuseSession(self):
+    session = runner.LintSession()
+
+    self.assertEquals([],
+                      self._GetErrorCodes(session, 'good.js', _GOOD_SCRIPT))
+    self.assertIn(
+        errors.FILE_IN_BLOCK,
+        self._GetErrorCodes(session, 'foo.js', _BAD_TOKENIZATION_SCRIPT))
+
+    # No state from the file that failed to parse leaks into the next one.
+    self.assertEquals([],
+                      self._GetErrorCodes(session, 'good.js', _GOOD_SCRIPT))
+
+
+_GOOD_SCRIPT = """\
+var a = 3;
+var b = function(c) {
+  return a + c;
+};
+"""
+
+
 _BAD_TOKENIZATION_SCRIPT = """
 function foo () {
   var a = 3;
@@ -149,54 +149,162 @@ class DocFlag(object):
   def __init__(self, flag_token):
     """Creates the DocFlag object and attaches it to the given start token.
 
+    The type, name and description of the flag are parsed lazily the first
+    time any of them is accessed, since most flags are never inspected when
+    only a subset of the lint rules is enabled. Assigning a field (as the
+    error fixer does when it inserts tokens) parses it first, so the value
+    assigned is never overwritten by a later parse.
+
     Args:
       flag_token: The starting token of the flag.
     """
     self.flag_token = flag_token
     self.flag_type = flag_token.string.strip().lstrip('@')
 
-    # Extract type, if applicable.
-    self.type = None
-    self.type_start_token = None
-    self.type_end_token = None
+    self._type_parsed = False
+    self._type = None
+    self._type_start_token = None
+    self._type_end_token = None
+
+    self._name_parsed = False
+    self._name_token = None
+    self._name = None
+
+    self._description_parsed = False
+    self._description_start_token = None
+    self._description_end_token = None
+    self._description = None
+
+  @property
+  def type(self):
+    self._ParseType()
+    return self._type
+
+  @type.setter
+  def type(self, value):
+    self._ParseType()
+    self._type = value
+
+  @property
+  def type_start_token(self):
+    self._ParseType()
+    return self._type_start_token
+
+  @type_start_token.setter
+  def type_start_token(self, value):
+    self._ParseType()
+    self._type_start_token = value
+
+  @property
+  def type_end_token(self):
+    self._ParseType()
+    return self._type_end_token
+
+  @type_end_token.setter
+  def type_end_token(self, value):
+    self._ParseType()
+    self._type_end_token = value
+
+  @property
+  def name_token(self):
+    self._ParseName()
+    return self._name_token
+
+  @name_token.setter
+  def name_token(self, value):
+    self._ParseName()
+    self._name_token = value
+
+  @property
+  def name(self):
+    self._ParseName()
+    return self._name
+
+  @name.setter
+  def name(self, value):
+    self._ParseName()
+    self._name = value
+
+  @property
+  def description_start_token(self):
+    self._ParseDescription()
+    return self._description_start_token
+
+  @description_start_token.setter
+  def description_start_token(self, value):
+    self._ParseDescription()
+    self._description_start_token = value
+
+  @property
+  def description_end_token(self):
+    self._ParseDescription()
+    return self._description_end_token
+
+  @description_end_token.setter
+  def description_end_token(self, value):
+    self._ParseDescription()
+    self._description_end_token = value
+
+  @property
+  def description(self):
+    self._ParseDescription()
+    return self._description
+
+  @description.setter
+  def description(self, value):
+    self._ParseDescription()
+    self._description = value
+
+  def _ParseType(self):
+    """Extracts the type of the flag, if applicable."""
+    if self._type_parsed:
+      return
+    self._type_parsed = True
+
     if self.flag_type in self.HAS_TYPE:
+      flag_token = self.flag_token
       brace = tokenutil.SearchUntil(flag_token, [Type.DOC_START_BRACE],
                                     Type.FLAG_ENDING_TYPES)
       if brace:
         end_token, contents = _GetMatchingEndBraceAndContents(brace)
-        self.type = contents
-        self.type_start_token = brace
-        self.type_end_token = end_token
+        self._type = contents
+        self._type_start_token = brace
+        self._type_end_token = end_token
       elif (self.flag_type in self.TYPE_ONLY and
           flag_token.next.type not in Type.FLAG_ENDING_TYPES):
-        self.type_start_token = flag_token.next
-        self.type_end_token, self.type = _GetEndTokenAndContents(
-            self.type_start_token)
-        if self.type is not None:
-          self.type = self.type.strip()
-
-    # Extract name, if applicable.
-    self.name_token = None
-    self.name = None
+        self._type_start_token = flag_token.next
+        self._type_end_token, self._type = _GetEndTokenAndContents(
+            self._type_start_token)
+        if self._type is not None:
+          self._type = self._type.strip()
+
+  def _ParseName(self):
+    """Extracts the name of the flag, if applicable."""
+    if self._name_parsed:
+      return
+    self._name_parsed = True
+
     if self.flag_type in self.HAS_NAME:
       # Handle bad case, name could be immediately after flag token.
-      self.name_token = _GetNextIdentifierToken(flag_token)
+      self._name_token = _GetNextIdentifierToken(self.flag_token)
 
       # Handle good case, if found token is after type start, look for
       # identifier after type end, since types contain identifiers.
-      if (self.type and self.name_token and
-          tokenutil.Compare(self.name_token, self.type_start_token) > 0):
-        self.name_token = _GetNextIdentifierToken(self.type_end_token)
+      if (self.type and self._name_token and
+          tokenutil.Compare(self._name_token, self.type_start_token) > 0):
+        self._name_token = _GetNextIdentifierToken(self.type_end_token)
 
-      if self.name_token:
-        self.name = self.name_token.string
+      if self._name_token:
+        self._name = self._name_token.string
+
+  def _ParseDescription(self):
+    """Extracts the description of the flag, if applicable."""
+    if self._description_parsed:
+      return
+    self._description_parsed = True
 
-    # Extract description, if applicable.
-    self.description_start_token = None
-    self.description_end_token = None
-    self.description = None
     if self.flag_type in self.HAS_DESCRIPTION:
-      search_start_token = flag_token
+      search_start_token = self.flag_token
       if self.name_token and self.type_end_token:
         if tokenutil.Compare(self.type_end_token, self.name_token) > 0:
           search_start_token = self.type_end_token
@@ -210,8 +318,8 @@ class DocFlag(object):
       interesting_token = tokenutil.Search(search_start_token,
           Type.FLAG_DESCRIPTION_TYPES | Type.FLAG_ENDING_TYPES)
       if interesting_token.type in Type.FLAG_DESCRIPTION_TYPES:
-        self.description_start_token = interesting_token
-        self.description_end_token, self.description = (
+        self._description_start_token = interesting_token
+        self._description_end_token, self._description = (
             _GetEndTokenAndContents(interesting_token))
 
 
@@ -7,6 +7,9 @@ def fix_path():
     sys.path.append(os.path.dirname(__file__))
     sys.path.append(os.path.join(os.path.dirname(__file__), 'lib'))
 
+    # Generated Protocol Buffer messages (*_pb2.py)
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'common', 'messages'))
+
 
 def main():
     import settings
@@ -21,6 +24,13 @@ def main():
         ))
 
 
+    # Batched calls
+    routes.append(Route('/_/batch',
+            handler='services.batch.BatchHandler',
+            name='batch'
+        ))
+
+
     # Guestbook
     routes.append(Route('/_/guestbook/list',
             handler='services.guestbook.GuestbookHandler:list_greetings',
@@ -30,9 +40,37 @@ def main():
             handler='services.guestbook.GuestbookHandler:post_greeting',
             name='guestbook-post'
         ))
+    routes.append(Route('/_/guestbook/post_multi',
+            handler='services.guestbook.GuestbookHandler:post_greetings',
+            name='guestbook-post-multi',
+            methods=['POST']
+        ))
+    routes.append(Route('/_/guestbook/delete',
+            handler='services.guestbook.GuestbookHandler:delete_greeting',
+            name='guestbook-delete',
+            methods=['POST']
+        ))
+
+
+    # Latency percentiles
+    routes.append(Route('/_/stats',
+            handler='api.stats.StatsHandler',
+            name='stats'
+        ))
+
+
+    # Deferred tasks, run here so their functions can be imported
+    routes.append(Route('/_ah/queue/deferred',
+            handler='google.appengine.ext.deferred.TaskHandler',
+            name='deferred'
+        ))
 
     from api.Application import Application
-    return Application(routes, debug=settings.DEBUG)
+    from api.compression import GzipMiddleware
+    from api.stats import StatsMiddleware
+    app = Application(routes, debug=settings.DEBUG)
+    app = GzipMiddleware(app, threshold=settings.GZIP_THRESHOLD)
+    return StatsMiddleware(app, server_timing=settings.DEBUG)
 
 
 ## Initialize Application
@@ -1,12 +1,25 @@
+import time
+
 from webapp2 import Response
 
 from codecs import JSONCodec
 
 
 class APIResponse(Response):
+    """
+    Response holding an encoded API message.
+
+    Responses get a strong ETag, and webob answers the conditional requests
+    (If-None-Match, If-Modified-Since) matching it with 304 Not Modified.
+    """
 
     default_codec = JSONCodec
 
+    default_conditional_response = True
+
+    # Measurements of the request (api.stats.RequestStats), if any
+    stats = None
+
     def __init__(self, *args, **kwargs):
         try:
             self.codec = kwargs['codec']()
@@ -17,13 +30,45 @@ class APIResponse(Response):
         super(APIResponse, self).__init__(*args, **kwargs)
 
     def _message__get(self):
-        self.codec.decode(self.body.decode(self.charset or 'UTF-8'))
+        return self.codec.decode(self.body)
 
     def _message__set(self, value):
-        self.body = self.codec.encode(value).encode(self.charset or 'UTF-8')
+        # Messages the negotiated codec cannot represent are sent as JSON
+        if not self.codec.can_encode(value):
+            self.codec = self.default_codec()
+
+        start = time.time()
+        body = self.codec.encode(value)
+        if isinstance(body, unicode):
+            body = body.encode(self.charset or 'UTF-8')
+        if self.stats:
+            self.stats.encode_time += time.time() - start
+
+        self.headers['Content-Type'] = self.codec.mime_type
+        self.body = body
+
+        # Handlers may have set a cheaper ETag already, see
+        # BaseAPIHandler.not_modified()
+        if self.etag is None:
+            self.md5_etag()
 
     def _message__del(self):
         del self.body
 
     message = property(_message__get, _message__set, _message__del)
 
+    def stream_message(self, value):
+        """
+        Sends value like the message property, but encodes it while the body
+        is sent, for large messages such as long lists. The response gets no
+        ETag of its own, handlers may set a version based one.
+        """
+        if not self.codec.can_encode(value):
+            self.codec = self.default_codec()
+
+        self.headers['Content-Type'] = self.codec.mime_type
+        if hasattr(self.codec, 'iterencode'):
+            self.app_iter = self.codec.iterencode(value)
+        else:
+            self.body = self.codec.encode(value)
+
@@ -1,7 +1,24 @@
+from google.appengine.ext import ndb
 from webapp2 import WSGIApplication
 
 from APIResponse import APIResponse
 
+
+@ndb.toplevel
+def dispatcher(router, request, response):
+    """
+    Dispatches requests like webapp2, waiting for the handlers which are ndb
+    tasklets, and for all the datastore operations they started, to finish.
+    """
+    rv = router.default_dispatcher(request, response)
+    if isinstance(rv, ndb.Future):
+        rv = rv.get_result()
+    return rv
+
 class Application(WSGIApplication):
     response_class = APIResponse
 
+    def __init__(self, *args, **kwargs):
+        super(Application, self).__init__(*args, **kwargs)
+        self.router.set_dispatcher(dispatcher)
+
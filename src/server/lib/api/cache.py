@@ -0,0 +1,236 @@
+"""
+Read-through cache of API responses.
+
+Responses of read handlers are cached by namespace, path and query
+parameters. Write handlers invalidate a whole namespace at once by replacing
+its version, which is part of every key of the namespace, so the stale
+entries are simply never read again and expire on their own. Versions are
+random rather than counters, so an evicted version can never be reused,
+and they also make cheap ETags (see etag()).
+
+Eventually consistent queries may still miss a write for a moment after it
+invalidated the namespace. Handlers built on them pass consistent=False to
+cached, and their responses are not stored while the namespace is
+settling().
+
+    class GuestbookHandler(BaseAPIHandler):
+
+        @cached('guestbook')
+        def list_greetings(self):
+            ...
+
+        @invalidates('guestbook')
+        def post_greeting(self):
+            ...
+
+The entries are kept in memcache, or in an in-process LRU cache when the
+memcache API is not available. Both decorators also wrap ndb tasklets, and
+then act once the future returned by the method is done.
+"""
+import collections, functools, hashlib, threading, time, urllib, uuid
+
+try:
+    from google.appengine.api import memcache
+except ImportError:
+    memcache = None
+
+try:
+    from google.appengine.ext import ndb
+except ImportError:
+    ndb = None
+
+
+# Seconds a cached response is kept by default
+DEFAULT_TIME = 60
+
+# Seconds after an invalidation during which eventually consistent queries
+# may not reflect the write yet
+SETTLE_TIME = 5
+
+# The time argument of the cache methods shadows the module
+_now = time.time
+
+
+class LRUCache(object):
+    """
+    In-process cache evicting the least recently used entries, with the subset
+    of the memcache interface used by this module.
+    """
+
+    def __init__(self, max_size=1000):
+        self.max_size = max_size
+        self.items_ = collections.OrderedDict()
+        self.lock_ = threading.Lock()
+
+    def get(self, key):
+        with self.lock_:
+            try:
+                value, expires = self.items_.pop(key)
+            except KeyError:
+                return None
+
+            if expires and expires < _now():
+                return None
+
+            self.items_[key] = (value, expires)
+            return value
+
+    def set(self, key, value, time=0):
+        expires = time and _now() + time or 0
+        with self.lock_:
+            self.items_.pop(key, None)
+            self.items_[key] = (value, expires)
+            while len(self.items_) > self.max_size:
+                self.items_.popitem(last=False)
+        return True
+
+    def add(self, key, value, time=0):
+        if self.get(key) is not None:
+            return False
+        return self.set(key, value, time=time)
+
+    def delete(self, key):
+        with self.lock_:
+            self.items_.pop(key, None)
+        return True
+
+client = memcache or LRUCache()
+
+
+def _version_key(namespace):
+    return 'api:{0}:version'.format(namespace)
+
+def _settling_key(namespace):
+    return 'api:{0}:settling'.format(namespace)
+
+def get_version(namespace):
+    """
+    Returns the current version of the cached responses of namespace.
+    """
+    key = _version_key(namespace)
+
+    version = client.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not client.add(key, version):
+            # Another request set the version first
+            version = client.get(key) or version
+
+    return version
+
+def invalidate(namespace):
+    """
+    Invalidates all the cached responses of namespace.
+    """
+    client.set(_version_key(namespace), uuid.uuid4().hex)
+    client.set(_settling_key(namespace), 1, time=SETTLE_TIME)
+
+def settling(namespace):
+    """
+    Returns whether namespace was invalidated less than SETTLE_TIME seconds
+    ago, when eventually consistent queries may not reflect the write yet.
+    """
+    return client.get(_settling_key(namespace)) is not None
+
+def cache_key(namespace, request):
+    """
+    Returns the cache key of the response to request, from its path, its
+    query parameters in a canonical order and the Accept header the response
+    format is negotiated from.
+    """
+    query = urllib.urlencode(sorted((k.encode('utf-8'), v.encode('utf-8'))
+            for k, v in request.GET.items()))
+    digest = hashlib.sha1('{0}?{1}\n{2}'.format(request.path, query,
+            request.headers.get('Accept', ''))).hexdigest()
+
+    return 'api:{0}:{1}:{2}'.format(namespace, get_version(namespace), digest)
+
+def etag(namespace, request):
+    """
+    Returns an ETag for the response to request which changes whenever
+    namespace is invalidated, without building the response.
+    """
+    return hashlib.sha1(cache_key(namespace, request)).hexdigest()
+
+
+# Response headers stored along with the cached bodies
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def _after(rv, callback, always=False):
+    """
+    Calls callback once a handler method returning rv is done, which for
+    tasklets is when the returned future is. Unless always is set, callback
+    is not called when the method fails.
+    """
+    if ndb and isinstance(rv, ndb.Future):
+        return _after_async(rv, callback, always)
+
+    callback()
+    return rv
+
+if ndb:
+    @ndb.tasklet
+    def _after_async(future, callback, always):
+        try:
+            rv = yield future
+        except Exception:
+            if always:
+                callback()
+            raise
+
+        callback()
+        raise ndb.Return(rv)
+
+
+def cached(namespace, time=DEFAULT_TIME, consistent=True):
+    """
+    Decorates a handler method to serve its successful responses from the
+    cache for up to time seconds. Unless consistent is set, responses are
+    not stored while the namespace is settling().
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = cache_key(namespace, self.request)
+
+            entry = client.get(key)
+            if entry is not None:
+                headers, body = entry
+                self.response.headers.update(headers)
+                self.response.body = body
+                return
+
+            def store():
+                if self.response.status_int != 200:
+                    return
+                if not consistent and settling(namespace):
+                    return
+
+                headers = [(name, self.response.headers[name])
+                        for name in CACHED_HEADERS if name in self.response.headers]
+                client.set(key, (headers, self.response.body), time=time)
+
+            return _after(method(self, *args, **kwargs), store)
+
+        return wrapper
+    return decorator
+
+def invalidates(namespace):
+    """
+    Decorates a handler method to invalidate the cached responses of
+    namespace once it has run.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                rv = method(self, *args, **kwargs)
+            except Exception:
+                invalidate(namespace)
+                raise
+
+            return _after(rv, lambda: invalidate(namespace), always=True)
+
+        return wrapper
+    return decorator
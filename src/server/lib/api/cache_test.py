@@ -0,0 +1,233 @@
+"""
+Unit tests for the api.cache module.
+
+Run from src/server/lib:
+
+    python -m unittest api.cache_test
+
+The memcache tests need the App Engine SDK on the path, and are skipped
+without it.
+"""
+import unittest
+
+from api import cache
+
+try:
+    from google.appengine.api import memcache
+    from google.appengine.ext import testbed
+except ImportError:
+    testbed = None
+
+
+class FakeRequest(object):
+
+    def __init__(self, path, query=None, accept=''):
+        self.path = path
+        self.GET = query or {}
+        self.headers = {'Accept': accept}
+
+class FakeResponse(object):
+
+    def __init__(self):
+        self.status_int = 200
+        self.headers = {}
+        self.body = ''
+
+class FakeHandler(object):
+
+    def __init__(self, request):
+        self.request = request
+        self.response = FakeResponse()
+        self.calls = 0
+
+    @cache.cached('test')
+    def list(self, status=200):
+        self.calls += 1
+        self.response.status_int = status
+        self.response.headers['Content-Type'] = 'application/json'
+        self.response.headers['ETag'] = '"v{0}"'.format(self.calls)
+        self.response.body = 'body {0}'.format(self.calls)
+
+    @cache.cached('test', consistent=False)
+    def list_eventual(self):
+        self.calls += 1
+        self.response.body = 'body {0}'.format(self.calls)
+
+    @cache.invalidates('test')
+    def post(self, fail=False):
+        if fail:
+            raise ValueError('failed')
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self._now = cache._now
+        cache._now = lambda: self.now
+
+    def tearDown(self):
+        cache._now = self._now
+
+    def testGetSet(self):
+        lru = cache.LRUCache()
+        self.assertEqual(None, lru.get('a'))
+        lru.set('a', 1)
+        self.assertEqual(1, lru.get('a'))
+
+    def testEvictsLeastRecentlyUsed(self):
+        lru = cache.LRUCache(max_size=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(1, lru.get('a'))
+        self.assertEqual(None, lru.get('b'))
+        self.assertEqual(3, lru.get('c'))
+
+    def testExpires(self):
+        lru = cache.LRUCache()
+        lru.set('a', 1, time=10)
+        lru.set('b', 2)
+
+        self.now += 11
+        self.assertEqual(None, lru.get('a'))
+        self.assertEqual(2, lru.get('b'))
+
+    def testAdd(self):
+        lru = cache.LRUCache()
+        self.assertTrue(lru.add('a', 1))
+        self.assertFalse(lru.add('a', 2))
+        self.assertEqual(1, lru.get('a'))
+
+    def testDelete(self):
+        lru = cache.LRUCache()
+        lru.set('a', 1)
+        lru.delete('a')
+        self.assertEqual(None, lru.get('a'))
+
+
+class CacheTestMixin(object):
+    """Tests run against each cache client"""
+
+    def testVersionIsStable(self):
+        self.assertEqual(cache.get_version('test'), cache.get_version('test'))
+
+    def testInvalidateChangesVersion(self):
+        version = cache.get_version('test')
+        cache.invalidate('test')
+        self.assertNotEqual(version, cache.get_version('test'))
+        self.assertEqual(cache.get_version('other'), cache.get_version('other'))
+
+    def testCacheKeyIgnoresQueryOrder(self):
+        request = FakeRequest('/_/list', {u'a': u'1', u'b': u'2'})
+        key = cache.cache_key('test', request)
+
+        request.GET = dict(reversed(request.GET.items()))
+        self.assertEqual(key, cache.cache_key('test', request))
+
+    def testCacheKeyVaries(self):
+        key = cache.cache_key('test', FakeRequest('/_/list', {u'a': u'1'}))
+
+        self.assertNotEqual(key, cache.cache_key('test', FakeRequest('/_/list', {u'a': u'2'})))
+        self.assertNotEqual(key, cache.cache_key('test', FakeRequest('/_/other', {u'a': u'1'})))
+        self.assertNotEqual(key, cache.cache_key('test',
+                FakeRequest('/_/list', {u'a': u'1'}, accept='application/x-protobuf')))
+
+        cache.invalidate('test')
+        self.assertNotEqual(key, cache.cache_key('test', FakeRequest('/_/list', {u'a': u'1'})))
+
+    def testCachedServesFromCache(self):
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list()
+
+        other = FakeHandler(FakeRequest('/_/list'))
+        other.list()
+
+        self.assertEqual(0, other.calls)
+        self.assertEqual('body 1', other.response.body)
+        self.assertEqual('application/json', other.response.headers['Content-Type'])
+        self.assertEqual('"v1"', other.response.headers['ETag'])
+
+    def testCachedSkipsErrors(self):
+        FakeHandler(FakeRequest('/_/list')).list(status=500)
+
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list()
+        self.assertEqual(1, handler.calls)
+
+    def testInvalidates(self):
+        FakeHandler(FakeRequest('/_/list')).list()
+        FakeHandler(FakeRequest('/_/post')).post()
+
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list()
+        self.assertEqual(1, handler.calls)
+
+    def testInvalidatesOnFailure(self):
+        FakeHandler(FakeRequest('/_/list')).list()
+        self.assertRaises(ValueError, FakeHandler(FakeRequest('/_/post')).post, fail=True)
+
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list()
+        self.assertEqual(1, handler.calls)
+
+    def testSettling(self):
+        self.assertFalse(cache.settling('test'))
+        FakeHandler(FakeRequest('/_/post')).post()
+        self.assertTrue(cache.settling('test'))
+        self.assertFalse(cache.settling('other'))
+
+    def testInconsistentNotStoredWhileSettling(self):
+        FakeHandler(FakeRequest('/_/post')).post()
+
+        FakeHandler(FakeRequest('/_/list')).list_eventual()
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list_eventual()
+        self.assertEqual(1, handler.calls)
+
+    def testInconsistentStoredWhenSettled(self):
+        FakeHandler(FakeRequest('/_/list')).list_eventual()
+        handler = FakeHandler(FakeRequest('/_/list'))
+        handler.list_eventual()
+        self.assertEqual(0, handler.calls)
+
+
+class LRUClientTest(CacheTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.client = cache.client
+        cache.client = cache.LRUCache()
+
+    def tearDown(self):
+        cache.client = self.client
+
+    def testSettlingEnds(self):
+        now = cache._now
+        try:
+            FakeHandler(FakeRequest('/_/post')).post()
+            cache._now = lambda: now() + cache.SETTLE_TIME + 1
+            self.assertFalse(cache.settling('test'))
+        finally:
+            cache._now = now
+
+
+@unittest.skipIf(testbed is None, 'App Engine SDK not available')
+class MemcacheClientTest(CacheTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        self.testbed = testbed.Testbed()
+        self.testbed.activate()
+        self.testbed.init_memcache_stub()
+
+        self.client = cache.client
+        cache.client = memcache
+
+    def tearDown(self):
+        cache.client = self.client
+        self.testbed.deactivate()
+
+
+if __name__ == '__main__':
+    unittest.main()
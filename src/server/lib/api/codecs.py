@@ -1,33 +1,188 @@
-import json
+import datetime, json
+
+try:
+    from google.protobuf.descriptor import FieldDescriptor
+except ImportError:
+    FieldDescriptor = None
+
+try:
+    from google.appengine.ext import ndb
+except ImportError:
+    ndb = None
+
+
+## Conversion to plain values
+
+# Types which are encoded as they are
+_PLAIN_TYPES = frozenset([str, unicode, int, long, float, bool, type(None)])
+
+# Functions converting an object to a plain value, by class
+_extractors = {}
+
+def _model_extractor(cls):
+    names = sorted(cls._properties)
+
+    def extract(entity):
+        if entity._projection:
+            fields = entity._projection
+        elif isinstance(entity, ndb.Expando):
+            fields = entity._properties
+        else:
+            fields = names
+
+        values = dict((name, getattr(entity, name)) for name in fields)
+        if entity.key:
+            values['id'] = entity.key.id()
+        return values
+
+    return extract
+
+def _get_extractor(cls):
+    try:
+        return _extractors[cls]
+    except KeyError:
+        pass
+
+    if hasattr(cls, '__json__'):
+        extract = cls.__json__
+    elif issubclass(cls, (datetime.datetime, datetime.date, datetime.time)):
+        extract = cls.isoformat
+    elif ndb and issubclass(cls, ndb.Model):
+        extract = _model_extractor(cls)
+    elif ndb and issubclass(cls, ndb.Key):
+        extract = cls.urlsafe
+    else:
+        raise TypeError('{0!r} cannot be converted to a plain value'.format(cls))
+
+    _extractors[cls] = extract
+    return extract
+
+def _extract(o):
+    return _get_extractor(type(o))(o)
+
+def to_plain(o):
+    """
+    Converts o to plain dicts, lists and scalars. Messages (__json__),
+    datastore entities and keys and dates are converted by extractors cached
+    per class.
+    """
+    cls = type(o)
+    if cls in _PLAIN_TYPES:
+        return o
+    if cls is dict:
+        return dict((k, to_plain(v)) for k, v in o.iteritems())
+    if cls is list or cls is tuple:
+        return [to_plain(v) for v in o]
+    if isinstance(o, dict):
+        return dict((k, to_plain(v)) for k, v in o.iteritems())
+
+    return to_plain(_get_extractor(cls)(o))
 
-from messages import BaseAPIMessage
 
 class BaseCodec(object):
 
     mime_type = 'text/plain'
 
+    # Whether the codec can be used at all
+    available = True
+
+    def can_encode(self, o):
+        return True
+
     def encode(self, o):
         pass
 
     def decode(self, buf):
         pass
 
+# Shared by all the JSON codecs. The C accelerated encoder only calls back
+# into Python for the objects which are not plain values, which is faster
+# than converting the whole message beforehand.
+_json_encoder = json.JSONEncoder(separators=(',', ':'), default=_extract)
+
 class JSONCodec(BaseCodec):
 
     mime_type = 'application/json'
 
-    class JSONEncoder(json.JSONEncoder):
-        def default(self, o):
-            if isinstance(o, BaseAPIMessage):
-                return o.__json__()
+    # Lists longer than this are encoded in chunks of this many items by
+    # iterencode()
+    chunk_size = 500
+
+    def encode(self, o):
+        return _json_encoder.encode(o)
+
+    def iterencode(self, o):
+        """
+        Encodes o in chunks, so large lists are never held encoded as a whole.
+        """
+        encode = _json_encoder.encode
+
+        if type(o) not in _PLAIN_TYPES and not isinstance(o, (dict, list, tuple)):
+            o = _extract(o)
 
-            return super(JSONCodec.JSONEncoder, self).default(o)
+        if isinstance(o, dict):
+            separator = '{'
+            for k, v in o.iteritems():
+                if not isinstance(k, basestring):
+                    k = json.dumps(k) # As the encoder does
+                yield separator + encode(k) + ':'
+                for chunk in self.iterencode(v):
+                    yield chunk
+                separator = ','
+            yield separator == '{' and '{}' or '}'
+        elif isinstance(o, (list, tuple)) and len(o) > self.chunk_size:
+            for i in xrange(0, len(o), self.chunk_size):
+                chunk = encode(list(o[i:i + self.chunk_size]))
+                yield (i and ',' or '[') + chunk[1:-1]
+            yield ']'
+        else:
+            yield encode(o)
 
-    def __init__(self):
-        self.encoder_ = self.JSONEncoder()
+    def decode(self, buf):
+        return json.loads(buf)
+
+class ProtobufCodec(BaseCodec):
+    """
+    Encodes messages to the binary Protocol Buffer format, using the generated
+    class (from src/common/messages) set as the protobuf_class of the message.
+    The fields of the message are taken from its JSON representation.
+    """
+
+    mime_type = 'application/x-protobuf'
+
+    available = FieldDescriptor is not None
+
+    def __init__(self, protobuf_class=None):
+        self.protobuf_class = protobuf_class
+
+    def can_encode(self, o):
+        return getattr(o, 'protobuf_class', None) is not None
 
     def encode(self, o):
-        return self.encoder_.encode(o)
+        message = o.protobuf_class()
+        self.fill_(message, to_plain(o))
+        return message.SerializeToString()
 
     def decode(self, buf):
-        return self.encoder_.decode(buf)
+        message = self.protobuf_class()
+        message.ParseFromString(buf)
+        return message
+
+    def fill_(self, message, values):
+        message.SetInParent()
+        for name, value in values.iteritems():
+            field = message.DESCRIPTOR.fields_by_name.get(name)
+            if value is None or field is None:
+                continue
+
+            if field.label == FieldDescriptor.LABEL_REPEATED:
+                if field.type == FieldDescriptor.TYPE_MESSAGE:
+                    items = getattr(message, name)
+                    for item in value:
+                        self.fill_(items.add(), item)
+                else:
+                    getattr(message, name).extend(value)
+            elif field.type == FieldDescriptor.TYPE_MESSAGE:
+                self.fill_(getattr(message, name), value)
+            else:
+                setattr(message, name, value)
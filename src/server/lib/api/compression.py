@@ -0,0 +1,111 @@
+"""
+Gzip compression of the API responses.
+
+GzipMiddleware compresses the responses larger than a threshold for the
+clients accepting gzip. Bodies are compressed chunk by chunk while they are
+sent, so streamed responses (see APIResponse.stream_message) are never held
+compressed as a whole.
+
+    app = GzipMiddleware(Application(routes), threshold=1024)
+
+Compressed responses get their own strong ETag (with a '-gzip' suffix), and
+the suffix is removed from If-None-Match so the conditional requests of the
+clients still match the ETags set by the handlers.
+"""
+import zlib
+
+
+# Responses smaller than this many bytes are not worth compressing
+DEFAULT_THRESHOLD = 1024
+
+# Compresses JSON almost as well as level 9, at a fraction of the time
+DEFAULT_LEVEL = 6
+
+ETAG_SUFFIX = '-gzip'
+
+
+def accepts_gzip(accept_encoding):
+    """
+    Returns whether an Accept-Encoding header allows gzip.
+    """
+    qualities = {}
+    for coding in accept_encoding.split(','):
+        params = coding.split(';')
+        name = params[0].strip().lower()
+
+        quality = 1.0
+        for param in params[1:]:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+
+    return qualities.get('gzip', qualities.get('*', 0.0)) > 0
+
+
+class GzipMiddleware(object):
+    """
+    WSGI middleware compressing the responses of an API application.
+    """
+
+    def __init__(self, app, threshold=DEFAULT_THRESHOLD, level=DEFAULT_LEVEL):
+        self.app = app
+        self.threshold = threshold
+        self.level = level
+
+    def __call__(self, environ, start_response):
+        gzip = (environ.get('REQUEST_METHOD') != 'HEAD'
+                and accepts_gzip(environ.get('HTTP_ACCEPT_ENCODING', '')))
+
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if gzip and if_none_match:
+            environ['HTTP_IF_NONE_MATCH'] = if_none_match.replace(ETAG_SUFFIX + '"', '"')
+
+        compress = []
+
+        def start_compressed_response(status, headers, exc_info=None):
+            code = int(status.split(' ', 1)[0])
+            names = dict((name.lower(), value) for name, value in headers)
+            length = names.get('content-length')
+
+            headers = list(headers)
+            if gzip and code == 304:
+                # Repeat the ETag the client sent
+                if if_none_match and ETAG_SUFFIX + '"' in if_none_match:
+                    headers = self.suffix_etag_(headers)
+            elif (gzip and code >= 200 and code != 204 and 'content-encoding' not in names
+                    and (length is None or int(length) >= self.threshold)):
+                headers = [(name, value) for name, value in self.suffix_etag_(headers)
+                        if name.lower() != 'content-length']
+                headers.append(('Content-Encoding', 'gzip'))
+                compress.append(True)
+
+            headers.append(('Vary', 'Accept-Encoding'))
+            return start_response(status, headers, exc_info)
+
+        result = self.app(environ, start_compressed_response)
+        if not compress:
+            return result
+
+        return self.compress_(result)
+
+    def suffix_etag_(self, headers):
+        return [(name, name.lower() == 'etag' and value.endswith('"')
+                and value[:-1] + ETAG_SUFFIX + '"' or value)
+                for name, value in headers]
+
+    def compress_(self, result):
+        # wbits above 16 write the gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        try:
+            for chunk in result:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.flush()
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
@@ -1,7 +1,76 @@
 from webapp2 import RequestHandler
 
-from codecs import JSONCodec
+from codecs import JSONCodec, ProtobufCodec
 
 
 class BaseAPIHandler(RequestHandler):
+    """
+    Handler of API requests.
+
+    Handler methods may be ndb tasklets, so the independent datastore
+    operations of a request overlap:
+
+        @ndb.tasklet
+        def get(self):
+            greetings, count = yield (Greeting.query().fetch_async(10),
+                                      Greeting.query().count_async())
+            self.response.message = BaseAPIMessage(...)
+    """
     default_codec = JSONCodec
+
+    # Codecs offered to the clients, in order of preference
+    codecs = [JSONCodec, ProtobufCodec]
+
+    def initialize(self, request, response):
+        super(BaseAPIHandler, self).initialize(request, response)
+
+        response.codec = self.negotiate_codec()()
+        response.headers.add('Vary', 'Accept')
+
+        # Measurements of the request, see api.stats
+        response.stats = request.environ.get('api.stats')
+        if response.stats and request.route:
+            response.stats.route = request.route.name
+
+    def negotiate_codec(self):
+        """
+        Returns the codec class of the response, from the Accept header of
+        the request. Clients which do not ask for a codec get JSON.
+        """
+        # The order of the offers breaks the ties, e.g. for */*
+        codecs = [codec for codec in self.codecs if codec.available]
+
+        mime_type = self.request.accept.best_match([codec.mime_type for codec in codecs])
+        for codec in codecs:
+            if codec.mime_type == mime_type:
+                return codec
+        return self.default_codec
+
+    def not_modified(self, etag=None, last_modified=None):
+        """
+        Sets the validators of the response, and returns whether the client
+        already has this version of it, in which case the response is set to
+        304 Not Modified and the handler does not need to build the body.
+
+            if self.not_modified(etag=cache.etag('guestbook', self.request)):
+                return
+        """
+        if etag is not None:
+            self.response.etag = etag
+        if last_modified is not None:
+            self.response.last_modified = last_modified
+
+        request = self.request
+        if request.method not in ('GET', 'HEAD'):
+            return False
+
+        if 'If-None-Match' in request.headers:
+            fresh = etag is not None and etag in request.if_none_match
+        elif request.if_modified_since and last_modified is not None:
+            fresh = self.response.last_modified <= request.if_modified_since
+        else:
+            fresh = False
+
+        if fresh:
+            self.response.set_status(304)
+        return fresh
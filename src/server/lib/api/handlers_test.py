@@ -0,0 +1,96 @@
+"""
+Unit tests for the tasklet support of the API handlers.
+
+Run from src/server/lib, with the App Engine SDK and its webapp2 and webob
+libraries on the path:
+
+    python -m unittest api.handlers_test
+
+The tests are skipped without the SDK.
+"""
+import json
+import unittest
+
+try:
+    from google.appengine.ext import ndb, testbed
+    import webapp2
+except ImportError:
+    testbed = None
+else:
+    from api import cache
+    from api.Application import Application
+    from api.handlers import BaseAPIHandler
+    from api.messages import BaseAPIMessage
+
+    class Thing(ndb.Model):
+        value = ndb.StringProperty()
+
+    class TaskletHandler(BaseAPIHandler):
+
+        calls = 0
+
+        @ndb.tasklet
+        def get_thing(self):
+            key = yield Thing(value=u'x').put_async()
+            thing = yield key.get_async()
+            self.response.message = BaseAPIMessage(thing.value)
+
+        @ndb.tasklet
+        def put_later(self):
+            # Not waited for by the handler, only by the application
+            Thing(value=u'y').put_async()
+            self.response.message = BaseAPIMessage(None)
+
+        @cache.cached('things')
+        @ndb.tasklet
+        def count_things(self):
+            TaskletHandler.calls += 1
+            count = yield Thing.query().count_async()
+            self.response.message = BaseAPIMessage(count)
+
+
+@unittest.skipIf(testbed is None, 'App Engine SDK not available')
+class TaskletHandlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.testbed = testbed.Testbed()
+        self.testbed.activate()
+        self.testbed.init_datastore_v3_stub()
+        self.testbed.init_memcache_stub()
+        ndb.get_context().clear_cache()
+
+        TaskletHandler.calls = 0
+        self.app = Application([
+                webapp2.Route('/thing', handler=TaskletHandler, handler_method='get_thing'),
+                webapp2.Route('/later', handler=TaskletHandler, handler_method='put_later'),
+                webapp2.Route('/count', handler=TaskletHandler, handler_method='count_things'),
+            ])
+
+    def tearDown(self):
+        self.testbed.deactivate()
+
+    def get(self, path):
+        return webapp2.Request.blank(path).get_response(self.app)
+
+    def testResultIsAwaitedAndWritten(self):
+        response = self.get('/thing')
+
+        self.assertEqual(200, response.status_int)
+        self.assertEqual({'result': 'x', 'error': None}, json.loads(response.body))
+
+    def testPendingOperationsAreAwaited(self):
+        self.get('/later')
+
+        self.assertEqual(1, Thing.query().count())
+
+    def testCachedTaskletIsStoredOnceDone(self):
+        first = self.get('/count')
+        second = self.get('/count')
+
+        self.assertEqual(1, TaskletHandler.calls)
+        self.assertEqual({'result': 0, 'error': None}, json.loads(first.body))
+        self.assertEqual(first.body, second.body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,9 @@
 
 class BaseAPIMessage(object):
 
+    # Generated Protocol Buffer class of the message, used by ProtobufCodec
+    protobuf_class = None
+
     def __init__(self, result, error=None):
         self.result = result
         self.error = error
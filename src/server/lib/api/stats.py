@@ -0,0 +1,161 @@
+"""
+Latency instrumentation of the API.
+
+StatsMiddleware measures every request: the wall time, the time spent
+encoding messages, the size of the response and the number of datastore
+RPCs. The measurements are aggregated per route into percentiles over the
+last SAMPLES requests of the instance, which StatsHandler sends (see
+/_/stats). With server_timing set, every response also gets a Server-Timing
+header with its own measurements.
+
+    app = StatsMiddleware(Application(routes), server_timing=settings.DEBUG)
+"""
+import collections, threading, time
+
+try:
+    from google.appengine.api import apiproxy_stub_map
+except ImportError:
+    apiproxy_stub_map = None
+
+from google.appengine.api import users
+
+from handlers import BaseAPIHandler
+from messages import BaseAPIMessage
+
+
+# Requests kept per route to compute the percentiles
+SAMPLES = 1000
+
+PERCENTILES = (50, 90, 99)
+
+
+class RequestStats(object):
+    """
+    Measurements of a single request.
+    """
+
+    def __init__(self):
+        self.route = None
+        self.start = time.time()
+        self.encode_time = 0.0
+        self.rpcs = 0
+
+    def elapsed(self):
+        return time.time() - self.start
+
+    def server_timing(self):
+        return 'app;dur={0:.1f}, encode;dur={1:.1f}, datastore;desc="{2} RPCs"'.format(
+                self.elapsed() * 1000, self.encode_time * 1000, self.rpcs)
+
+
+class RouteStats(object):
+    """
+    Last SAMPLES measurements of a route.
+    """
+
+    metrics = ('wall_ms', 'encode_ms', 'size', 'rpcs')
+
+    def __init__(self):
+        self.count = 0
+        self.samples = dict((metric, collections.deque(maxlen=SAMPLES))
+                for metric in self.metrics)
+
+    def add(self, stats, size):
+        self.count += 1
+        self.samples['wall_ms'].append(stats.elapsed() * 1000)
+        self.samples['encode_ms'].append(stats.encode_time * 1000)
+        self.samples['size'].append(size)
+        self.samples['rpcs'].append(stats.rpcs)
+
+    def summary(self):
+        summary = {'count': self.count}
+        for metric, samples in self.samples.iteritems():
+            values = sorted(samples)
+            summary[metric] = dict(('p{0}'.format(p),
+                    values[min(len(values) - 1, len(values) * p // 100)])
+                    for p in PERCENTILES)
+        return summary
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+# Measurements of the request being handled by the current thread
+_local = threading.local()
+
+def record(stats, size):
+    route = stats.route or '(none)'
+    with _routes_lock:
+        try:
+            route_stats = _routes[route]
+        except KeyError:
+            route_stats = _routes[route] = RouteStats()
+        route_stats.add(stats, size)
+
+def summary():
+    """
+    Returns the percentiles of the measurements, by route name.
+    """
+    with _routes_lock:
+        return dict((route, stats.summary()) for route, stats in _routes.iteritems())
+
+
+def _count_rpc(service, call, request, response, rpc=None):
+    stats = getattr(_local, 'stats', None)
+    if stats:
+        stats.rpcs += 1
+
+if apiproxy_stub_map:
+    apiproxy_stub_map.apiproxy.GetPreCallHooks().Append(
+            'api-stats', _count_rpc, 'datastore_v3')
+
+
+class StatsMiddleware(object):
+    """
+    WSGI middleware measuring the requests of an API application. Handlers
+    find the measurements of their request in the 'api.stats' environ key.
+    """
+
+    def __init__(self, app, server_timing=False):
+        self.app = app
+        self.server_timing = server_timing
+
+    def __call__(self, environ, start_response):
+        stats = environ['api.stats'] = _local.stats = RequestStats()
+
+        def start_timed_response(status, headers, exc_info=None):
+            if self.server_timing:
+                headers = list(headers) + [('Server-Timing', stats.server_timing())]
+            return start_response(status, headers, exc_info)
+
+        try:
+            result = self.app(environ, start_timed_response)
+        finally:
+            _local.stats = None
+
+        return self.iterate_(result, stats)
+
+    def iterate_(self, result, stats):
+        size = 0
+        try:
+            for chunk in result:
+                size += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+            record(stats, size)
+
+
+class StatsHandler(BaseAPIHandler):
+    """Sends the latency percentiles of the routes, for this instance"""
+
+    def get(self):
+        # Checked here as well as in app.yaml, which does not apply to the
+        # calls made through /_/batch
+        if not users.is_current_user_admin():
+            self.response.set_status(403)
+            self.response.message = BaseAPIMessage(None, error='Forbidden')
+            return
+
+        self.response.message = BaseAPIMessage(summary())
@@ -0,0 +1,89 @@
+import json
+import logging
+
+from google.appengine.ext import ndb
+from webapp2 import Request
+from webob import exc
+
+from api.codecs import JSONCodec
+from api.handlers import BaseAPIHandler
+from api.messages import BaseAPIMessage
+
+
+class BatchHandler(BaseAPIHandler):
+    """
+    Runs several API calls in a single request.
+
+    The body of the request is a JSON list of calls:
+
+        [{"method": "GET", "url": "/_/guestbook/list?limit=5"},
+         {"method": "POST", "url": "/_/guestbook/post", "params": {"content": "Hi"}}]
+
+    Every call is dispatched to its handler as a sub-request, and the result
+    is the list of their statuses and JSON bodies, in the same order:
+
+        [{"status": 200, "body": {"result": ..., "error": null}}, ...]
+
+    Calls are run as ndb tasklets, so the datastore operations of handlers
+    returning futures overlap.
+    """
+
+    # Most calls accepted in a single batch
+    max_calls = 20
+
+    def post(self):
+        try:
+            calls = json.loads(self.request.body)
+            if not isinstance(calls, list):
+                raise ValueError('Expected a list of calls')
+            if len(calls) > self.max_calls:
+                raise ValueError('At most {0} calls are allowed'.format(self.max_calls))
+
+            requests = [self._make_request(call) for call in calls]
+        except (ValueError, TypeError, AttributeError) as e:
+            self.response.set_status(400)
+            self.response.message = BaseAPIMessage(None, error=str(e))
+            return
+
+        futures = [self._call_async(request) for request in requests]
+        ndb.Future.wait_all(futures)
+
+        self.response.message = BaseAPIMessage([f.get_result() for f in futures])
+
+    def _make_request(self, call):
+        method = call.get('method', 'GET').upper()
+        url = call['url']
+        if not url.startswith('/_/') or url.startswith(self.request.path):
+            raise ValueError('Invalid URL ({0})'.format(url))
+
+        params = call.get('params') or {}
+        if method == 'GET':
+            request = Request.blank(url, base_url=self.request.host_url)
+            request.GET.update(params)
+        else:
+            request = Request.blank(url, base_url=self.request.host_url, POST=params)
+            request.method = method
+
+        # Results are embedded in the JSON response
+        request.headers['Accept'] = JSONCodec.mime_type
+        return request
+
+    @ndb.tasklet
+    def _call_async(self, request):
+        response = self.app.response_class()
+        try:
+            rv = self.app.router.default_dispatcher(request, response)
+            if isinstance(rv, ndb.Future):
+                yield rv
+        except exc.HTTPException as e:
+            raise ndb.Return({'status': e.code, 'body': None})
+        except Exception:
+            logging.exception('Batched call to {0} failed'.format(request.path_qs))
+            raise ndb.Return({'status': 500, 'body': None})
+
+        try:
+            body = response.body and json.loads(response.body) or None
+        except ValueError:
+            body = response.body # Not an API message
+
+        raise ndb.Return({'status': response.status_int, 'body': body})
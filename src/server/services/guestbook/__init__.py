@@ -1,42 +1,200 @@
+import json
+
+from google.appengine.datastore.datastore_query import Cursor
+from google.appengine.api import users
+from google.appengine.api.datastore_errors import BadValueError
+from google.appengine.ext import deferred, ndb
+
+from api import cache
+from api.cache import cached, invalidates
 from api.handlers import BaseAPIHandler
 from api.messages import BaseAPIMessage
 
+from messages import GreetingPageMessage
 from models import Greeting
 
 
+# Greetings written by a single datastore put
+PUT_BATCH_SIZE = 500
+
+def put_greetings(greetings):
+    """
+    Writes a batch of at most PUT_BATCH_SIZE greetings, given as (id, content)
+    pairs, from a task queue task (see GuestbookHandler.post_greetings).
+
+    The pairs of a full batch pickle to less than 1 MB, the most the deferred
+    library can store for a task.
+    """
+    ndb.put_multi([Greeting(id=id, content=content) for id, content in greetings])
+
+    cache.invalidate('guestbook')
+
+
 class GuestbookHandler(BaseAPIHandler):
 
+    # Number of greetings returned when the client does not ask for a limit
+    default_page_size = 20
+
+    # Most greetings returned by a single list request
+    max_page_size = 100
+
+    # Most greetings accepted by a single bulk post
+    max_bulk_size = 5000
+
+    # Bulk posts of more greetings are written by a task queue task
+    defer_threshold = 1000
+
+    # Longest greeting, in bytes (the limit of indexed strings)
+    max_content_length = 1500
+
+    def _get_page_size(self):
+        try:
+            limit = int(self.request.get('limit', self.default_page_size))
+        except ValueError:
+            limit = self.default_page_size
+
+        return max(1, min(limit, self.max_page_size))
+
+    # The query is eventually consistent, see cache.settling()
+    @cached('guestbook', consistent=False)
+    @ndb.tasklet
     def list_greetings(self):
         """
-        Retrievies a list of guestbook entries from the database and sends it the
-        the client.
+        Retrieves a page of guestbook entries from the database, newest first,
+        and sends it to the client.
+
+        Query parameters:
+            limit: Number of entries to return, at most max_page_size.
+            cursor: Opaque cursor returned with the previous page.
+
+        The response holds the entries and the cursor of the next page, which
+        is null after the last page.
         """
-        self.response.headers['Content-Type'] = 'application/json'
+        # Polling clients mostly ask for pages that did not change. Right
+        # after a write the page may not show it yet, and must not get the
+        # ETag of the new version.
+        if (not cache.settling('guestbook')
+                and self.not_modified(etag=cache.etag('guestbook', self.request))):
+            return
+
+        try:
+            cursor = Cursor(urlsafe=self.request.get('cursor') or None)
+        except BadValueError:
+            self.response.set_status(400)
+            self.response.message = BaseAPIMessage(None, error='Invalid cursor')
+            return
 
-        greetings = Greeting.query()
+        # Only the projected properties are read, from the (date, content)
+        # index declared in index.yaml.
+        query = Greeting.query().order(-Greeting.date)
+        greetings, next_cursor, more = yield query.fetch_page_async(self._get_page_size(),
+                start_cursor=cursor,
+                projection=[Greeting.content, Greeting.date])
 
-        self.response.message = BaseAPIMessage(list(greetings))
+        self.response.message = GreetingPageMessage({
+                'greetings': [{
+                        'id': greeting.key.id(),
+                        'content': greeting.content,
+                        'date': greeting.date.isoformat(),
+                    } for greeting in greetings],
+                'cursor': more and next_cursor and next_cursor.urlsafe() or None,
+            })
 
+    @invalidates('guestbook')
+    @ndb.tasklet
     def post_greeting(self):
         """
         Accepts a greeting from the client and saves it to the database.
         """
-        self.response.headers['Content-Type'] = 'application/json'
+        content = self.request.get('content')
+
+        greeting = Greeting(content=content)
+
+        key = yield greeting.put_async()
 
-        self.request.get('content')
+        self.response.message = BaseAPIMessage({'id': key.id()})
 
-        greeting = Greeting(content=)
+    def _parse_greetings(self):
+        greetings = json.loads(self.request.body)
+        if not isinstance(greetings, list):
+            raise ValueError('Expected a list of greetings')
+        if len(greetings) > self.max_bulk_size:
+            raise ValueError('At most {0} greetings are allowed'.format(self.max_bulk_size))
 
-        key = greeting.put()
+        contents = []
+        for i, greeting in enumerate(greetings):
+            content = isinstance(greeting, dict) and greeting.get('content')
+            if (not isinstance(content, basestring)
+                    or len(content.encode('utf-8')) > self.max_content_length):
+                raise ValueError('Invalid greeting at index {0}'.format(i))
+            contents.append(content)
 
-        self.response.message = BaseAPIMessage({'id': key})
+        return contents
+
+    @invalidates('guestbook')
+    @ndb.tasklet
+    def post_greetings(self):
+        """
+        Accepts a JSON list of greetings ({"content": ...}) from the client and
+        saves them to the database, in batches of PUT_BATCH_SIZE.
+
+        The response holds the ids of the greetings, in order. Lists longer
+        than defer_threshold are written by a task queue task: their ids are
+        allocated up front, and the response status is 202 Accepted.
+        """
+        try:
+            contents = self._parse_greetings()
+        except ValueError as e:
+            self.response.set_status(400)
+            self.response.message = BaseAPIMessage(None, error=str(e))
+            return
 
+        if len(contents) > self.defer_threshold:
+            first, last = yield Greeting.allocate_ids_async(len(contents))
+            ids = range(first, last + 1)
+
+            # One task per batch, each well under the size limit of tasks
+            greetings = zip(ids, contents)
+            for i in xrange(0, len(greetings), PUT_BATCH_SIZE):
+                deferred.defer(put_greetings, greetings[i:i + PUT_BATCH_SIZE])
+            self.response.set_status(202)
+        else:
+            greetings = [Greeting(content=content) for content in contents]
+
+            futures = []
+            for i in xrange(0, len(greetings), PUT_BATCH_SIZE):
+                futures.extend(ndb.put_multi_async(greetings[i:i + PUT_BATCH_SIZE]))
+            keys = yield futures
+            ids = [key.id() for key in keys]
+
+        self.response.message = BaseAPIMessage(ids)
+
+    @invalidates('guestbook')
+    @ndb.tasklet
     def delete_greeting(self):
         """
-        Deletes the specified greeting.
+        Deletes the specified greetings. Only administrators may delete
+        greetings, anyone else gets 403 Forbidden.
+
+        Query parameters:
+            id: Id of a greeting to delete, may be repeated.
+
+        The response holds the ids of the greetings which were deleted.
         """
-        self.response.headers['Content-Type'] = 'application/json'
+        if not users.is_current_user_admin():
+            self.response.set_status(403)
+            self.response.message = BaseAPIMessage(None, error='Forbidden')
+            return
+
+        try:
+            keys = [ndb.Key(Greeting, int(id)) for id in self.request.get_all('id')]
+        except ValueError:
+            self.response.set_status(400)
+            self.response.message = BaseAPIMessage(None, error='Invalid id')
+            return
 
-        greetings = Greeting.query()
+        greetings = yield ndb.get_multi_async(keys)
+        keys = [greeting.key for greeting in greetings if greeting]
+        yield ndb.delete_multi_async(keys)
 
-        self.response.message = BaseAPIMessage(list(greetings))
+        self.response.message = BaseAPIMessage([key.id() for key in keys])
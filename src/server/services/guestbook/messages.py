@@ -0,0 +1,13 @@
+from api.messages import BaseAPIMessage
+
+try:
+    import guestbook_pb2
+except ImportError:
+    guestbook_pb2 = None
+
+
+class GreetingPageMessage(BaseAPIMessage):
+    """A page of greetings, see GuestbookHandler.list_greetings"""
+
+    if guestbook_pb2:
+        protobuf_class = guestbook_pb2.GreetingPageMessage
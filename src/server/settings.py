@@ -1,5 +1,9 @@
 ## Server Settings
 
+# API responses larger than this many bytes are gzipped for the clients
+# accepting it
+GZIP_THRESHOLD = 1024
+
 
 ## Import auto generated settings
 from generated_settings_ import *
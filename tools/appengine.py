@@ -7,6 +7,8 @@ import os, sys
 
 from waflib.Configure import conf
 
+import jvmserver
+
 def options(ctx):
 
     ctx.add_option('--port', action='store',
@@ -71,6 +73,11 @@ def build(ctx):
         ctx.fatal('Unable to locate YAML file at ({0})'.format(ctx.env.APPENGINE_APP_YAML))
     ctx.copy(yaml)
 
+    # Datastore indexes, deployed along with the application
+    index_yaml = yaml.parent.find_node('index.yaml')
+    if index_yaml:
+        ctx.copy(index_yaml)
+
 @conf
 def generate_settings_file(ctx, settings_map, node):
 
@@ -104,6 +111,8 @@ def serve(ctx):
     except KeyboardInterrupt:
         Logs.pprint('RED', 'Development Server Interrupted... Shutting Down')
         proc.terminate()
+    finally:
+        jvmserver.shutdown()
 
 def deploy(ctx):
     print('Deploying Application to AppEngine...')
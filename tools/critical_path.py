@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Reports the critical path of a build.
+
+The run time of every task is recorded, and once the build is over the
+chain of dependent tasks that bounds the build time is printed, along with
+the total task time and the parallelism that was achieved.
+
+===========================================================
+EXAMPLE
+===========================================================
+
+def options(ctx):
+    ctx.load('critical_path')
+
+def build(ctx):
+    ctx.load('critical_path')
+
+$ waf build --critical-path
+
+===========================================================
+"""
+import time
+from waflib import Task, Logs
+
+def options(ctx):
+    ctx.add_option('--critical-path', action='store_true', default=False,
+            dest='critical_path',
+            help='Report the critical path of the build')
+
+def build(ctx):
+    if ctx.options.critical_path:
+        # The tasks are only timed when the report is asked for
+        if Task.TaskBase.process is not process:
+            Task.TaskBase.process = process
+        ctx.add_post_fun(report)
+
+_process = Task.TaskBase.process
+
+def process(self):
+    """Task.TaskBase.process, recording when the task started and ended.
+
+    The end is recorded by run and post_run themselves: process hands the
+    task back to the build as its last step, and the build may be over
+    before it returns.
+    """
+    self.time_start = time.time()
+
+    def timed(method):
+        def wrapper():
+            try:
+                return method()
+            finally:
+                self.time_end = time.time()
+        return wrapper
+
+    self.run = timed(self.run)
+    self.post_run = timed(self.post_run)
+    try:
+        return _process(self)
+    finally:
+        del self.run, self.post_run
+
+def duration(tsk):
+    try:
+        return tsk.time_end - tsk.time_start
+    except AttributeError:
+        return 0.0 # Skipped
+
+def describe(tsk):
+    return str(tsk).strip().replace('\n', ' ')
+
+def critical_path(tasks):
+    """Returns the chain of dependent tasks with the longest total duration.
+
+    The dependencies are taken from run_after, which holds both the ordering
+    and the file constraints of the tasks.
+    """
+    longest = {}
+
+    def visit(tsk):
+        try:
+            return longest[tsk]
+        except KeyError:
+            pass
+
+        longest[tsk] = (0.0, []) # Guard against cycles
+        best = (0.0, [])
+        for dep in getattr(tsk, 'run_after', ()):
+            path = visit(dep)
+            if path[0] > best[0]:
+                best = path
+
+        longest[tsk] = (best[0] + duration(tsk), best[1] + [tsk])
+        return longest[tsk]
+
+    paths = [visit(t) for t in tasks]
+    if not paths:
+        return 0.0, []
+    return max(paths, key=lambda path: path[0])
+
+def report(bld):
+    # Skipped tasks are not returned, follow run_after to find the tasks
+    # between the ones that ran.
+    tasks = set()
+    pending = list(bld.returned_tasks)
+    while pending:
+        tsk = pending.pop()
+        if tsk in tasks:
+            continue
+        tasks.add(tsk)
+        pending.extend(getattr(tsk, 'run_after', ()))
+
+    ran = [t for t in tasks if hasattr(t, 'time_end')]
+    if not ran:
+        Logs.info('Critical path: no task was run')
+        return
+
+    wall = max(t.time_end for t in ran) - min(t.time_start for t in ran)
+    total = sum(duration(t) for t in ran)
+    length, path = critical_path(tasks)
+
+    Logs.pprint('CYAN', 'Critical path: {0:.3f}s of {1:.3f}s wall time, '
+            '{2:.3f}s total task time over {3} tasks (parallelism {4:.2f})'.format(
+                length, wall, total, len(ran), total / wall if wall else 1.0))
+
+    for tsk in path:
+        if hasattr(tsk, 'time_end'):
+            Logs.info('  {0:8.3f}s  {1}'.format(duration(tsk), describe(tsk)))
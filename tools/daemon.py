@@ -4,20 +4,32 @@
 # rewritten by Thomas Nagy 2009
 
 """
-Start a new build as soon as something changes in the build directory.
+Start a new build as soon as something changes in the source directory.
 
-PyInotify, Fam, Gamin or time-threshold are used for the detection
+The source tree is watched with PyInotify when it is available, and polled
+for modified files otherwise. The watches are kept for the whole session,
+and bursts of changes (e.g. saving several files, or a checkout) are
+collected into a single rebuild.
 
-For now only PyInotify and time threshold are supported
-Watching for new svn revisions could be added too
+Between rounds the hashes of the unchanged source files are kept, so a
+rebuild only reads the files that changed; waf then only runs the tasks
+whose signatures changed.
 """
 
-import select, errno, os, time
+import os, time
 from waflib import Utils, Scripting, Logs, Build, Node, Context, Options
 
-w_pyinotify = w_fam = w_gamin = None
+import jvmserver
+
+# Seconds without any new change before a rebuild is started
+DEBOUNCE = 0.2
+
+# Seconds between two scans of the source tree when polling
+POLL_INTERVAL = 1
+
+w_pyinotify = None
 def check_support():
-	global w_pyinotify, w_fam, w_gamin
+	global w_pyinotify
 	try:
 		import pyinotify as w_pyinotify
 	except ImportError:
@@ -28,121 +40,174 @@ def check_support():
 			wm = w_pyinotify.Notifier(wm)
 			wm = None
 		except:
-			raise
 			w_pyinotify = None
 
-	try:
-		import gamin as w_gamin
-	except ImportError:
-		w_gamin = None
-	else:
-		try:
-			test = w_gamin.WatchMonitor()
-			test.disconnect()
-			test = None
-		except:
-			w_gamin = None
+_h_file = Utils.h_file
+_hashes = {}
+_uncached = None
 
+def h_file(fname):
+	"""Utils.h_file, reusing the hashes of the source files from the last round"""
+	if fname.startswith(_uncached):
+		return _h_file(fname)
 	try:
-		import _fam as w_fam
-	except ImportError:
-		w_fam = None
-	else:
-		try:
-			test = w_fam.open()
-			test.close()
-			test = None
-		except:
-			w_fam = None
+		return _hashes[fname]
+	except KeyError:
+		ret = _hashes[fname] = _h_file(fname)
+		return ret
 
 def daemon(ctx):
 	"""waf command: rebuild as soon as something changes"""
-	bld = None
-	while True:
-		bld = Context.create_context('build')
-		try:
-			bld.options = Options.options
-			bld.cmd = 'build'
-			bld.execute()
-		except ctx.errors.WafError as e:
-			print(e)
-		except KeyboardInterrupt:
-			Utils.pprint('RED', 'interrupted')
-			break
+	# The JVMs of the Java tools (--jvm-server) stay warm between rebuilds
+	try:
+		_daemon(ctx)
+	finally:
+		jvmserver.shutdown()
 
-		try:
-			x = ctx.state
-		except AttributeError:
-			setattr(ctx, 'state', DirWatch())
-			x = ctx.state
+def _daemon(ctx):
+	global _uncached
 
-		x.wait(bld)
+	watch = DirWatch(Context.top_dir, Context.out_dir)
+
+	# Build outputs are not watched, their hashes must never be reused
+	_uncached = Context.out_dir + os.sep
+	Utils.h_file = h_file
+
+	changed = first_change = None
+	try:
+		while True:
+			start = time.time()
+			bld = Context.create_context('build')
+			try:
+				bld.options = Options.options
+				bld.cmd = 'build'
+				bld.execute()
+			except ctx.errors.WafError as e:
+				print(e)
+			except KeyboardInterrupt:
+				Logs.pprint('RED', 'interrupted')
+				break
+
+			if first_change:
+				Logs.pprint('CYAN', '{0} file(s) changed, rebuilt in {1:.3f}s ({2:.3f}s after the first change)'.format(
+					len(changed), time.time() - start, time.time() - first_change))
+
+			changed, first_change = watch.wait()
+			for path in changed:
+				_hashes.pop(path, None)
+	finally:
+		Utils.h_file = _h_file
+		_hashes.clear()
+		watch.close()
 
 def options(opt):
 	"""So this shows how to add new commands from tools"""
 	Context.g_module.__dict__['daemon'] = daemon
 
 class DirWatch(object):
-	def __init__(self):
+	"""Watches a directory tree for changed files, ignoring the build
+	directory and hidden files and directories."""
+
+	def __init__(self, path, exclude):
+		self.path = path
+		self.exclude = exclude
+
 		check_support()
 		if w_pyinotify:
 			self.sup = 'pyinotify'
-		elif w_gamin:
-			self.sup = 'gamin'
-		elif w_fam:
-			self.sup = 'fam'
+			self.init_pyinotify()
 		else:
-			self.sup = 'dumb'
-		#self.sup = 'dumb'
-
-	def wait(self, bld):
-		return getattr(self.__class__, 'wait_' + self.sup)(self, bld)
-
-	def enumerate(self, node):
-		if os.path.exists(node.abspath()):
-			yield node.abspath()
-		try:
-			for x in node.children.values():
-				for k in self.enumerate(x):
-					yield k
-		except AttributeError:
-			pass
-		raise StopIteration
-
-	def wait_pyinotify(self, bld):
+			self.sup = 'poll'
+			self.init_poll()
 
-		class PE(w_pyinotify.ProcessEvent):
-			def stop(self, event):
-				self.notif.ev = True
-				self.notif.stop()
-				raise ValueError("stop for delete")
+	def excluded(self, path):
+		return (path == self.exclude or path.startswith(self.exclude + os.sep)
+				or os.path.basename(path).startswith('.'))
 
-			process_IN_DELETE = stop
-			process_IN_CLOSE = stop
-			process_default = stop
+	def wait(self):
+		"""Blocks until something changed and no other change followed within
+		DEBOUNCE seconds.
 
-		proc = PE()
-		wm = w_pyinotify.WatchManager()
-		notif = w_pyinotify.Notifier(wm, proc)
-		proc.notif = notif
+		Returns:
+			The set of the changed paths, and the time of the first change.
+		"""
+		return getattr(self, 'wait_' + self.sup)()
 
-		# well, we should add all the folders to watch here
-		for x in self.enumerate(bld.srcnode):
-			wm.add_watch(x, w_pyinotify.IN_DELETE | w_pyinotify.IN_CLOSE_WRITE)
+	def close(self):
+		getattr(self, 'close_' + self.sup)()
 
-		try:
-			# pyinotify uses an infinite loop ... not too nice, so we have to use an exception
-			notif.loop()
-		except ValueError:
-			pass
-		if not hasattr(notif, 'ev'):
-			raise KeyboardInterrupt
+	def init_pyinotify(self):
+		watch = self
 
-	def wait_dumb(self, bld):
-		time.sleep(5)
-
-	def wait_gamin(self, bld):
-		time.sleep(5)
-
-	def wait_fam(self, bld):
-		time.sleep(5)
+		class PE(w_pyinotify.ProcessEvent):
+			def process_IN_Q_OVERFLOW(self, event):
+				# Events were lost, forget every hash and rebuild
+				_hashes.clear()
+				watch.events.add(watch.path)
+
+			def process_default(self, event):
+				if not watch.excluded(event.pathname):
+					watch.events.add(event.pathname)
+
+		self.events = set()
+		self.wm = w_pyinotify.WatchManager()
+		self.notifier = w_pyinotify.Notifier(self.wm, PE())
+
+		mask = (w_pyinotify.IN_CLOSE_WRITE | w_pyinotify.IN_DELETE | w_pyinotify.IN_CREATE
+				| w_pyinotify.IN_MOVED_FROM | w_pyinotify.IN_MOVED_TO)
+		self.wm.add_watch(self.path, mask, rec=True, auto_add=True,
+				exclude_filter=self.excluded)
+
+	def wait_pyinotify(self):
+		self.events = set()
+		first_change = None
+		while True:
+			timeout = self.events and int(DEBOUNCE * 1000) or None
+			if self.notifier.check_events(timeout):
+				self.notifier.read_events()
+				self.notifier.process_events()
+				if self.events and not first_change:
+					first_change = time.time()
+			elif self.events:
+				return self.events, first_change
+
+	def close_pyinotify(self):
+		self.notifier.stop()
+
+	def init_poll(self):
+		self.files = self.scan()
+
+	def scan(self):
+		files = {}
+		for root, dirs, names in os.walk(self.path):
+			dirs[:] = [d for d in dirs if not self.excluded(os.path.join(root, d))]
+			for name in names:
+				path = os.path.join(root, name)
+				if self.excluded(path):
+					continue
+				try:
+					st = os.stat(path)
+				except OSError:
+					continue
+				files[path] = (st.st_mtime, st.st_size)
+		return files
+
+	def wait_poll(self):
+		changed = set()
+		first_change = None
+		while True:
+			time.sleep(changed and DEBOUNCE or POLL_INTERVAL)
+
+			files = self.scan()
+			diff = [p for p in set(files) | set(self.files) if files.get(p) != self.files.get(p)]
+			self.files = files
+
+			if diff:
+				changed.update(diff)
+				if not first_change:
+					first_change = time.time()
+			elif changed:
+				return changed, first_change
+
+	def close_poll(self):
+		pass
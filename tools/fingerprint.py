@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+"""
+Content hashed file names for static assets.
+
+The fingerprint task copies each asset to a name containing the hash of its
+contents (e.g. js/application.1f2e3d4c.js), rewrites the src/href references
+to the assets in an HTML file and writes a JSON manifest of the renames. As
+the names change with the contents, the fingerprinted assets can be cached
+forever.
+
+The fingerprinted copies are outputs of the task, so waf rebuilds them when
+they are removed. Their names are only known once the task has run, and are
+kept with the build data for the next builds.
+
+===========================================================
+EXAMPLE
+===========================================================
+
+def build(ctx):
+    ctx.load('fingerprint')
+
+    www = ctx.path.find_or_declare('www')
+    ctx.fingerprint(
+            assets   = [www.find_or_declare('js/app.js')],
+            html     = ctx.path.find_node('index.html'),
+            root     = www,
+            target   = www.find_or_declare('index.html'),
+            manifest = www.find_or_declare('manifest.json'))
+
+===========================================================
+"""
+import os, re, json
+
+from waflib import *
+from waflib.Configure import conf
+
+# Hex digits of the content hash used in the file names
+HASH_LENGTH = 8
+
+def options(ctx):
+    pass
+
+def configure(ctx):
+    pass
+
+class fingerprint_task(Task.Task):
+    """Fingerprints assets and rewrites their references in an HTML file"""
+
+    color = 'BLUE'
+
+    def __init__(self, assets, html, root, target, manifest, *k, **kw):
+        Task.Task.__init__(self, *k, **kw)
+
+        if not isinstance(assets, list):
+            assets = [assets]
+        self.assets = assets
+        self.root = root
+
+        self.set_inputs(self.assets)
+        self.set_inputs(html)
+        self.set_outputs([target, manifest])
+        self.static_outputs = list(self.outputs)
+
+    def runnable_status(self):
+        # Declare the fingerprinted copies of the previous build, so they are
+        # rebuilt when missing.
+        if len(self.outputs) == len(self.static_outputs):
+            bld = self.generator.bld
+            for path in bld.raw_deps.get(self.uid(), []):
+                self.outputs.append(bld.bldnode.find_or_declare(path))
+
+        return Task.Task.runnable_status(self)
+
+    def fingerprint(self, node):
+        """Writes the fingerprinted copy of node, returns its node"""
+
+        data = node.read('rb')
+        digest = Utils.to_hex(Utils.h_list(data))[:HASH_LENGTH]
+
+        base, ext = os.path.splitext(node.name)
+        hashed = node.parent.find_or_declare('{0}.{1}{2}'.format(base, digest, ext))
+
+        hashed.write(data, 'wb')
+
+        # Remove the copies of previous versions
+        old = re.compile(r'^{0}\.[0-9a-f]{{{1}}}{2}$'.format(
+            re.escape(base), HASH_LENGTH, re.escape(ext)))
+        for name in os.listdir(node.parent.abspath()):
+            if old.match(name) and name != hashed.name:
+                os.remove(os.path.join(node.parent.abspath(), name))
+
+        return hashed
+
+    def run(self):
+        html = self.inputs[-1].read()
+
+        manifest = {}
+        hashed_outputs = []
+        for node in self.assets:
+            hashed = self.fingerprint(node)
+            hashed_outputs.append(hashed)
+
+            ref = node.path_from(self.root).replace(os.sep, '/')
+            new_ref = hashed.path_from(self.root).replace(os.sep, '/')
+            manifest[ref] = new_ref
+
+            html = re.sub(r'''(\b(?:src|href)\s*=\s*["']/?){0}(["'])'''.format(re.escape(ref)),
+                    lambda m: m.group(1) + new_ref + m.group(2), html)
+
+        self.outputs[0].write(html)
+        self.outputs[1].write(json.dumps(manifest, indent=2, sort_keys=True))
+
+        # The copies are signed by post_run, and declared again by the next
+        # builds
+        self.outputs = self.static_outputs + hashed_outputs
+        bld = self.generator.bld
+        bld.raw_deps[self.uid()] = [n.path_from(bld.bldnode) for n in hashed_outputs]
+
+        return 0
+
+@conf
+def fingerprint(self, *k, **kw):
+    kw['env'] = self.env
+    tsk = fingerprint_task(*k, **kw)
+    self.add_to_group(tsk)
+    return tsk
@@ -1,10 +1,35 @@
 #! /usr/bin/env python
 # encoding: utf-8
 
-import os, sys
+import os, sys, shutil, threading
 from waflib import *
 from waflib.Configure import conf
 
+import jvmserver
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+COMPILER_MAIN = 'com.google.javascript.jscomp.CommandLineRunner'
+TEMPLATES_MAIN = 'com.google.template.soy.SoyToJsSrcCompiler'
+STYLESHEETS_MAIN = 'com.google.common.css.compiler.commandline.ClosureCommandLineCompiler'
+
+# Loads the stripped inputs of an 'incremental' compile, in order. The
+# dependencies are already sorted, so the debug loader of base.js is disabled.
+INCREMENTAL_LOADER = '''var CLOSURE_NO_DEPS = true;
+(function() {{
+  var files = [{files}];
+  var scripts = document.getElementsByTagName('script');
+  var base = scripts[scripts.length - 1].src.replace(/[^\\/]*$/, '');
+  for (var i = 0; i < files.length; i++) {{
+    document.write('<script src="' + base + '{directory}/' + files[i] +
+        '"></' + 'script>');
+  }}
+}})();
+'''
+
 def options(ctx):
     pass
 
@@ -33,7 +58,112 @@ def find_closure_tools(ctx, path='.'):
 
 def configure(ctx):
     ctx.load('python')
-    ctx.find_program('java', var='JAVA')
+    ctx.load('jvmserver')
+
+
+class CachedSource(object):
+    """Provides/requires of a JS file, as recorded in the DepsCache.
+
+    Stands in for closurebuilder._PathSource wherever depstree.DepsTree and
+    closurebuilder only need the dependency information of a file.
+    """
+
+    def __init__(self, path, provides, requires):
+        self._path = path
+        self.provides = provides
+        self.requires = requires
+
+    def __str__(self):
+        return 'CachedSource {0}'.format(self._path)
+
+    def GetPath(self):
+        return self._path
+
+
+class DepsCache(object):
+    """Persistent cache of the goog.provide/goog.require info of JS files.
+
+    Entries are keyed by path and reused as long as the file's mtime and size
+    are unchanged, so only modified files are read and parsed again. Entries
+    of files that are no longer found under their root are dropped. The
+    dependency order computed for a set of namespaces is cached as well, and
+    reused while the provides/requires of the scanned files are unchanged.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        self.orders = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+        try:
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') == self.VERSION:
+                self.files = data['files']
+                self.orders = data['orders']
+        except Exception:
+            # Missing or unreadable cache, start from scratch
+            pass
+
+    def get_source(self, path, closurebuilder):
+        """Returns a CachedSource for the JS file at path"""
+        st = os.stat(path)
+        stamp = (st.st_mtime, st.st_size)
+
+        entry = self.files.get(path)
+        if not entry or entry[0] != stamp:
+            js_source = closurebuilder._PathSource(path)
+            entry = (stamp, frozenset(js_source.provides),
+                    frozenset(js_source.requires))
+            self.files[path] = entry
+            self.dirty = True
+
+        return CachedSource(path, set(entry[1]), set(entry[2]))
+
+    def prune(self, roots, paths):
+        """Drops the entries of the files under roots missing from paths"""
+        prefixes = tuple(os.path.join(root, '') for root in roots)
+        stale = [path for path in self.files
+                if path.startswith(prefixes) and not path in paths]
+        for path in stale:
+            del self.files[path]
+        if stale:
+            self.dirty = True
+
+    def get_order(self, key, fingerprint):
+        """Returns the cached dependency order for key, or None"""
+        cached = self.orders.get(key)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+        return None
+
+    def set_order(self, key, fingerprint, paths):
+        self.orders[key] = (fingerprint, paths)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        data = {'version': self.VERSION, 'files': self.files,
+                'orders': self.orders}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, self.path)
+        self.dirty = False
+
+_deps_caches = {}
+
+def get_deps_cache(bld):
+    """Returns the DepsCache stored in the build directory of bld"""
+    path = os.path.join(bld.bldnode.abspath(), 'closure_deps.cache')
+    if path not in _deps_caches:
+        _deps_caches[path] = DepsCache(path)
+    return _deps_caches[path]
 
 
 class closure_compiler_task(Task.Task):
@@ -66,7 +196,7 @@ class closure_compiler_task(Task.Task):
             compiler_flags += ['--compilation_level=SIMPLE_OPTIMIZATIONS']
         elif compile_type == 'advanced':
             compiler_flags += ['--compilation_level=ADVANCED_OPTIMIZATIONS']
-        elif compile_type == 'concat' or compile_type is None:
+        elif compile_type in ('concat', 'incremental') or compile_type is None:
             pass # Default
         else:
             raise Execption('Unrecognized compile_type ({0})'.format(compile_type))
@@ -78,7 +208,7 @@ class closure_compiler_task(Task.Task):
         self.roots += roots
 
     def jscompiler(self):
-        args = [self.env.JAVA, '-jar', self.env.CLOSURE_COMPILER_JAR]
+        args = []
 
         for node in self.inputs:
             args += ['--js', node.abspath()]
@@ -87,7 +217,89 @@ class closure_compiler_task(Task.Task):
 
         args += self.compiler_flags
 
-        return self.bld.exec_command(args)
+        return jvmserver.run_jar(self, self.env.CLOSURE_COMPILER_JAR, COMPILER_MAIN, args)
+
+    def incremental(self):
+        """Strips each input on its own and writes a loader for them.
+
+        The stripped files are named after the hash of their source, in a
+        directory next to the target, so only the inputs that changed since
+        the last build are compiled. They are all compiled with a single
+        compiler run, with one module per file, chained in dependency order.
+
+        The stripped files are not signed by waf: their paths are kept with
+        the build data, and runnable_status() checks they still exist.
+        """
+
+        target = self.outputs[0]
+        cache_dir = target.parent.make_node(os.path.splitext(target.name)[0])
+        cache_dir.mkdir()
+
+        flags = ['--compilation_level=WHITESPACE_ONLY']
+        flags += [f for f in self.compiler_flags if f.startswith('--formatting')]
+
+        names = []
+        seen = set()
+        missing = []
+        for node in self.inputs:
+            name = 'm' + Utils.to_hex(Utils.h_list([
+                Utils.h_file(node.abspath()), flags, self.env.CLOSURE_COMPILER_JAR]))
+            if name in seen:
+                continue # Same contents as an earlier input
+            seen.add(name)
+            names.append(name)
+            if not os.path.exists(os.path.join(cache_dir.abspath(), name + '.js')):
+                missing.append((name, node))
+
+        if missing:
+            args = list(flags)
+            previous = None
+            for name, node in missing:
+                args += ['--js', node.abspath()]
+                if previous:
+                    args += ['--module', '{0}:1:{1}'.format(name, previous)]
+                else:
+                    args += ['--module', '{0}:1'.format(name)]
+                previous = name
+            args += ['--module_output_path_prefix', cache_dir.abspath() + os.sep]
+
+            ret = jvmserver.run_jar(self, self.env.CLOSURE_COMPILER_JAR, COMPILER_MAIN, args)
+            if ret:
+                return ret
+
+        # Drop the outputs of sources that no longer exist or changed
+        used = set(name + '.js' for name in names)
+        for filename in os.listdir(cache_dir.abspath()):
+            if not filename in used:
+                os.remove(os.path.join(cache_dir.abspath(), filename))
+
+        target.write(INCREMENTAL_LOADER.format(
+            directory=cache_dir.name,
+            files=', '.join("'{0}.js'".format(name) for name in names)))
+
+        bld = self.generator.bld
+        bld.raw_deps[(self.uid(), 'incremental')] = [
+                os.path.join(cache_dir.abspath(), name + '.js') for name in names]
+        return 0
+
+    def runnable_status(self):
+        ret = Task.Task.runnable_status(self)
+        bld = self.generator.bld
+
+        # Rebuild the stripped files of an incremental compile when removed
+        if ret == Task.SKIP_ME and self.compile_type == 'incremental':
+            for path in bld.raw_deps.get((self.uid(), 'incremental'), []):
+                if not os.path.exists(path):
+                    ret = Task.RUN_ME
+                    break
+
+        # scan() sets the inputs, but is skipped while the dependencies are
+        # unchanged, take them from the build data then.
+        if ret == Task.RUN_ME and not self.inputs:
+            self.set_inputs(bld.node_deps.get(self.uid(), []))
+            self.set_inputs(self.input_nodes)
+
+        return ret
 
     def run(self):
 
@@ -96,6 +308,8 @@ class closure_compiler_task(Task.Task):
             compiled_source = ''.join([s.read()+'\n' for s in self.inputs])
             self.outputs[0].write(compiled_source)
             return 0
+        elif self.compile_type == 'incremental':
+            return self.incremental()
         else:
             ## Compile
             return self.jscompiler()
@@ -103,23 +317,42 @@ class closure_compiler_task(Task.Task):
 
     def scan(self):
 
-        sources = set()
+        cache = get_deps_cache(self.bld)
 
-        for path in self.roots:
-            for js_path in self.treescan.ScanTreeForJsFiles(path):
-                sources.add(self.closurebuilder._PathSource(js_path))
+        with cache.lock:
+            sources = set()
 
-        tree = self.depstree.DepsTree(sources)
+            for path in self.roots:
+                for js_path in self.treescan.ScanTreeForJsFiles(path):
+                    sources.add(cache.get_source(js_path, self.closurebuilder))
 
-        input_namespaces = set()
-        for ns in self.namespaces:
-            input_namespaces.add(ns)
+            # Forget the files deleted or renamed since the last scan
+            cache.prune(self.roots, set(s.GetPath() for s in sources))
 
-        # The Closure Library base file must go first.
-        base = self.closurebuilder._GetClosureBaseFile(sources)
-        deps = [base] + tree.GetDependencies(input_namespaces)
+            # Only the provides/requires of the files affect the order
+            fingerprint = Utils.h_list(sorted(
+                (s.GetPath(), sorted(s.provides), sorted(s.requires))
+                for s in sources))
+            key = (tuple(self.roots), tuple(sorted(set(self.namespaces))))
 
-        dep_paths = (os.path.relpath(s.GetPath(), self.bld.path.srcpath()) for s in deps)
+            paths = cache.get_order(key, fingerprint)
+            if paths is None:
+                tree = self.depstree.DepsTree(sources)
+
+                input_namespaces = set()
+                for ns in self.namespaces:
+                    input_namespaces.add(ns)
+
+                # The Closure Library base file must go first.
+                base = self.closurebuilder._GetClosureBaseFile(sources)
+                deps = [base] + tree.GetDependencies(input_namespaces)
+
+                paths = [s.GetPath() for s in deps]
+                cache.set_order(key, fingerprint, paths)
+
+            cache.save()
+
+        dep_paths = (os.path.relpath(p, self.bld.path.srcpath()) for p in paths)
         dep_nodes = [self.bld.path.find_resource(p) for p in dep_paths]
         
         self.set_inputs(dep_nodes)
@@ -136,48 +369,216 @@ def closure_compiler(self, *k, **kw):
     return tsk
 
 
+class gjslint_task(Task.Task):
+    """Lints the JavaScript files of a root directory.
+
+    Style errors are reported but do not fail the build. The task is only
+    marked as done once the root is clean, so the errors are reported again
+    on the next build.
+    """
+
+    vars = ['PYTHON', 'CLOSURE_LINTER']
+    color = 'YELLOW'
+
+    def run(self):
+        command = [
+                self.env.PYTHON[0],
+                self.env.CLOSURE_LINTER,
+                '--strict', '--summary',
+                '-r', self.root.abspath(),
+                ]
+
+        self.clean = not self.exec_command(command)
+        if self.clean:
+            self.outputs[0].parent.mkdir()
+            self.outputs[0].write('')
+        return 0
+
+    def post_run(self):
+        if self.clean:
+            Task.Task.post_run(self)
+
 @TaskGen.feature('gjslint')
 def gjslint(self):
+    for root in self.roots:
+        tsk = self.create_task('gjslint', root.ant_glob('**/*.js'),
+                root.get_bld().make_node('.gjslint'))
+        tsk.root = root
 
-    command = [
-            self.env.PYTHON[0],
-            self.env.CLOSURE_LINTER,
-            '--strict', '--summary',
-            ]
+class fixjsstyle_task(Task.Task):
+    """Fixes the style of the JavaScript files of a root directory in place."""
 
-    for root in self.roots:
-        command += ['-r', root.abspath()]
-    
-    return self.bld.exec_command(command)
+    vars = ['PYTHON', 'CLOSURE_LINTER_FIX']
+    color = 'YELLOW'
+
+    def runnable_status(self):
+        return Task.RUN_ME
+
+    def run(self):
+        command = [
+                self.env.PYTHON[0],
+                self.env.CLOSURE_LINTER_FIX,
+                '--strict',
+                '-r', self.root.abspath(),
+                ]
+
+        return self.exec_command(command)
+
+    def post_run(self):
+        # The sources are the outputs, there is nothing to record
+        pass
 
 @TaskGen.feature('fixjsstyle')
 def fixjsstyle(self):
+    for root in self.roots:
+        tsk = self.create_task('fixjsstyle')
+        tsk.root = root
 
-    command = [
-            self.env.PYTHON[0],
-            self.env.CLOSURE_LINTER_FIX,
-            '--strict'
-            ]
+SOY_FLAGS = ['--shouldProvideRequireSoyNamespaces', '--cssHandlingScheme', 'GOOG']
 
-    for root in self.roots:
-        command += ['-r', root.abspath()]
+class template_task(Task.Task):
+    """Compiles a single template to JavaScript.
+
+    The signatures of each template are tracked by its own task, but the
+    templates that need to be rebuilt are compiled together by the
+    template_batch_task of the task generator.
+    """
+
+    vars = ['JAVA', 'CLOSURE_TEMPLATES_JAR']
+    color = 'BLUE'
+    before = ['closure_compiler_task']
+
+    def runnable_status(self):
+        if not self.batch.hasrun:
+            return Task.ASK_LATER
+        return Task.Task.runnable_status(self)
+
+    def run(self):
+        if self in self.batch.compiled:
+            return 0
 
-    return self.bld.exec_command(command)
+        # The compiler already reported the error for the whole batch
+        if self in self.batch.failed:
+            return self.batch.err_code or 1
+
+        args = SOY_FLAGS + [
+                '--outputPathFormat', self.outputs[0].abspath(),
+                self.inputs[0].abspath(),
+                ]
+
+        return jvmserver.run_jar(self, self.env.CLOSURE_TEMPLATES_JAR, TEMPLATES_MAIN, args)
+
+class template_batch_task(Task.Task):
+    """Compiles all the out of date templates of a task generator with a
+    single SoyToJsSrcCompiler invocation.
+
+    The inputs and outputs are those of all the templates, set as they are
+    added, so the uid and the file constraints of the task do not depend on
+    which templates are out of date.
+    """
+
+    vars = ['JAVA', 'CLOSURE_TEMPLATES_JAR']
+    color = 'BLUE'
+    before = ['closure_compiler_task']
+
+    def __init__(self, *k, **kw):
+        Task.Task.__init__(self, *k, **kw)
 
-TaskGen.declare_chain(name='template',
-        rule='${JAVA} -jar ${CLOSURE_TEMPLATES_JAR} \
-                --shouldProvideRequireSoyNamespaces \
-                --cssHandlingScheme GOOG \
-                --outputPathFormat ${TGT} \
-                ${SRC}',
-        ext_in='.soy', ext_out='.soy.js',
-        before='closure_compiler_task')
+        self.slaves = []
+        self.pending = {}
+        self.compiled = set()
+        self.failed = set()
+
+    def __str__(self):
+        nodes = [t.inputs[0].nice_path() for tasks in self.pending.values() for t in tasks]
+        return 'template_batch: {0}\n'.format(' '.join(nodes))
+
+    def add_slave(self, tsk):
+        tsk.batch = self
+        self.slaves.append(tsk)
+        self.set_inputs(tsk.inputs)
+        self.set_outputs(tsk.outputs)
+
+    def runnable_status(self):
+        for tsk in self.run_after:
+            if not tsk.hasrun:
+                return Task.ASK_LATER
+
+        bld = self.generator.bld
+
+        # --outputPathFormat can only mirror the input directories to the
+        # build directory; other templates are compiled by their own task.
+        self.pending = {}
+        for tsk in self.slaves:
+            node = tsk.inputs[0]
+            if node.is_child_of(bld.bldnode):
+                prefix = bld.bldnode
+            elif node.is_child_of(bld.srcnode):
+                prefix = bld.srcnode
+            else:
+                continue
+
+            if Task.Task.runnable_status(tsk) == Task.RUN_ME:
+                self.pending.setdefault(prefix, []).append(tsk)
+
+        if not self.pending:
+            return Task.SKIP_ME
+        return Task.RUN_ME
 
+    def run(self):
+        bld = self.generator.bld
+
+        output_format = os.path.join(bld.bldnode.abspath(),
+                '{INPUT_DIRECTORY}{INPUT_FILE_NAME_NO_EXT}.soy.js')
+
+        # The templates left here when a compilation fails fail as well
+        self.failed = set(t for tasks in self.pending.values() for t in tasks)
+
+        for prefix, tasks in self.pending.items():
+            args = SOY_FLAGS + [
+                    '--inputPrefix', prefix.abspath() + os.sep,
+                    '--outputPathFormat', output_format,
+                    ]
+            args += [t.inputs[0].path_from(prefix) for t in tasks]
+
+            ret = jvmserver.run_jar(self, self.env.CLOSURE_TEMPLATES_JAR, TEMPLATES_MAIN, args)
+            if ret:
+                return ret
+
+            self.compiled.update(tasks)
+            self.failed.difference_update(tasks)
+
+        return 0
+
+    def post_run(self):
+        # The signatures are recorded by the template tasks
+        pass
+
+@TaskGen.extension('.soy')
+def process_template(self, node):
+    try:
+        batch = self.template_batch
+    except AttributeError:
+        batch = self.template_batch = self.create_task('template_batch')
+
+    tsk = self.create_task('template', node, node.change_ext('.soy.js'))
+    batch.add_slave(tsk)
+
+@Task.update_outputs
 class closure_stylesheets_task(Task.Task):
+    """Compiles stylesheets with Closure Stylesheets.
+
+    The outputs are cached under the hash of the inputs and options, so
+    compiling stylesheets that were compiled before does not start the
+    compiler. Outputs are only considered changed when their contents change.
+    """
 
     vars = ['JAVA', 'CLOSURE_STYLESHEETS_JAR']
     color = 'PINK'
 
+    # Number of compilations kept in the cache
+    cache_size = 20
+
     def __init__(self, inputs, target, renaming_map=None, pretty=None, *k, **kw):
         Task.Task.__init__(self, *k, **kw)
 
@@ -191,10 +592,7 @@ class closure_stylesheets_task(Task.Task):
             self.set_outputs(self.renaming_map)
 
     def run(self):
-        command = [self.env.JAVA, '-jar',
-                self.env.CLOSURE_STYLESHEETS_JAR,
-                '--output-file', self.outputs[0].abspath(),
-                ]
+        command = ['--output-file', self.outputs[0].abspath()]
 
         if not self.pretty is None:
             command += ['--pretty-print']
@@ -209,7 +607,60 @@ class closure_stylesheets_task(Task.Task):
 
         command += [n.abspath() for n in self.inputs]
 
-        return self.bld.exec_command(command)
+        cache_dir = self.generator.bld.bldnode.make_node('closure_stylesheets_cache')
+        cache_dir.mkdir()
+
+        key = Utils.to_hex(Utils.h_list([
+            [Utils.h_file(n.abspath()) for n in self.inputs],
+            self.pretty is None, self.renaming_map is None,
+            # The contents, as the jar may be replaced in place
+            Utils.h_file(self.env.CLOSURE_STYLESHEETS_JAR)]))
+        cached = [os.path.join(cache_dir.abspath(), '{0}.{1}'.format(key, i))
+                for i in range(len(self.outputs))]
+
+        # Other stylesheet tasks may evict the entry meanwhile, it is then
+        # compiled again.
+        try:
+            for path, node in zip(cached, self.outputs):
+                shutil.copy(path, node.abspath())
+                os.utime(path, None)
+            return 0
+        except (IOError, OSError):
+            pass
+
+        ret = jvmserver.run_jar(self, self.env.CLOSURE_STYLESHEETS_JAR, STYLESHEETS_MAIN, command)
+        if ret:
+            return ret
+
+        # Written under a temporary name, so other tasks never read a partial
+        # entry
+        for path, node in zip(cached, self.outputs):
+            tmp = '{0}.{1}.tmp'.format(path, id(self))
+            shutil.copy(node.abspath(), tmp)
+            os.rename(tmp, path)
+
+        # Drop the least recently used compilations. The stylesheet tasks
+        # running in parallel share the cache, and may remove the same files.
+        try:
+            paths = []
+            for name in os.listdir(cache_dir.abspath()):
+                if name.endswith('.tmp'):
+                    continue # Being written
+                path = os.path.join(cache_dir.abspath(), name)
+                try:
+                    paths.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+            paths.sort(reverse=True)
+            for mtime, path in paths[self.cache_size * len(self.outputs):]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        except OSError:
+            pass
+
+        return 0
 
 @conf
 def closure_stylesheets(self, *k, **kw):
@@ -5,6 +5,10 @@ import os, sys
 from waflib import *
 from waflib.Configure import conf
 
+import jvmserver
+
+HTMLCOMPRESSOR_MAIN = 'com.googlecode.htmlcompressor.CmdLineCompressor'
+
 def options(ctx):
     pass
 
@@ -26,7 +30,7 @@ def find_htmlcompressor(ctx, path='.'):
 
 
 def configure(ctx):
-    ctx.find_program('java', var='JAVA')
+    ctx.load('jvmserver')
 
 
 class htmlcompressor_task(Task.Task):
@@ -40,12 +44,10 @@ class htmlcompressor_task(Task.Task):
         self.set_outputs(target)
 
     def run(self):
-        command = [self.env.JAVA, '-jar', self.env.HTMLCOMPRESSOR]
-
-        command += ['--output', self.outputs[0].abspath()]
+        command = ['--output', self.outputs[0].abspath()]
         command += [self.inputs[0].abspath()]
 
-        return self.bld.exec_command(command)
+        return jvmserver.run_jar(self, self.env.HTMLCOMPRESSOR, HTMLCOMPRESSOR_MAIN, command)
 
 @conf
 def htmlcompressor(self, *k, **kw):
@@ -7,43 +7,79 @@ from waflib import *
 from waflib.Configure import conf
 
 class HtmlCssRenamer(object):
-    
-    def __init__(self, renaming_map, input_html):
+    """Renames the CSS classes of HTML documents with a Closure renaming map.
+
+    A renamer can process many documents; the renamed class attributes are
+    cached, and the class parts missing from the renaming map are collected
+    and reported once by report().
+    """
+
+    def __init__(self, renaming_map, input_html=None):
         self.renaming_map = renaming_map
         self.input_html = input_html
 
+        self._renamed = {}
+        self.unmapped = {}
+
     def _parse_class_list(self, buf):
         return buf.split()
 
-    def process(self):
-        import html5lib, lxml.html
+    def rename(self, c_list_str):
+        """Returns the renamed value of a class attribute"""
+        try:
+            ret, unmapped = self._renamed[c_list_str]
+        except KeyError:
+            ret, unmapped = self._rename(c_list_str)
+            self._renamed[c_list_str] = ret, unmapped
 
-        doc = html5lib.parse(self.input_html, treebuilder='lxml', namespaceHTMLElements=False)
+        # Counted on every call, to report occurrences rather than attributes
+        for part in unmapped:
+            self.unmapped[part] = self.unmapped.get(part, 0) + 1
 
-        for e in doc.iter():
-            c_list_str = e.get('class')
-            if c_list_str:
-                class_list = self._parse_class_list(c_list_str)
+        return ret
+
+    def _rename(self, c_list_str):
+        new_classes = []
+        unmapped = []
+        for css_class in self._parse_class_list(c_list_str):
+
+            n_parts = []
 
-                new_classes = []
-                for css_class in class_list:
+            for part in css_class.split('-'):
+                n_part = self.renaming_map.get(part)
+                if n_part:
+                    n_parts.append(n_part)
+                else:
+                    n_parts.append(part)
+                    unmapped.append(part)
 
-                    n_parts = []
+            new_classes.append('-'.join(n_parts))
 
-                    for part in css_class.split('-'):
-                        n_part = self.renaming_map.get(part)
-                        if n_part:
-                            n_parts.append(n_part)
-                        else:
-                            n_parts.append(part)
-                            print('Warning: Verbose CSS class part "{0}"'.format(part))
+        return ' '.join(new_classes), unmapped
 
-                    new_classes.append('-'.join(n_parts))
+    def process(self, input_html=None):
+        import lxml.html
 
-                e.set('class', ' '.join(new_classes))
+        if input_html is None:
+            input_html = self.input_html
+
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        doc = lxml.html.document_fromstring(input_html, parser=parser).getroottree()
+
+        for e in doc.xpath('//*[@class]'):
+            c_list_str = e.get('class')
+            if c_list_str:
+                e.set('class', self.rename(c_list_str))
 
         return lxml.html.tostring(doc)
 
+    def report(self):
+        """Prints a warning for each class part missing from the renaming map"""
+        for part in sorted(self.unmapped):
+            count = self.unmapped[part]
+            print('Warning: Verbose CSS class part "{0}" ({1} occurrence{2})'.format(
+                part, count, count > 1 and 's' or ''))
+
 
 def parse_renaming_map(buf):
     prefix = 'goog.setCssNameMapping('
@@ -91,10 +127,13 @@ def options(ctx):
 def configure(ctx):
     ctx.load('python')
 
-    ctx.check_python_module('html5lib')
     ctx.check_python_module('lxml.html')
 
 class htmlcssrenamer_task(Task.Task):
+    """Renames the CSS classes of one or more HTML files.
+
+    inputs and target are matching lists of nodes (or single nodes).
+    """
 
     def __init__(self, inputs, renaming_map, target=None, *k, **kw):
         Task.Task.__init__(self, *k, **kw)
@@ -108,12 +147,13 @@ class htmlcssrenamer_task(Task.Task):
     def run(self):
 
         renaming_map = parse_renaming_map(self.renaming_map.read())
-        
-        input_html = self.inputs[0].read()
 
-        output_html = HtmlCssRenamer(renaming_map, input_html).process()
+        renamer = HtmlCssRenamer(renaming_map)
+
+        for node, target in zip(self.inputs[:-1], self.outputs):
+            target.write(renamer.process(node.read()))
 
-        self.outputs[0].write(output_html)
+        renamer.report()
 
         return 0
 
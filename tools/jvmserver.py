@@ -0,0 +1,262 @@
+#! /usr/bin/env python
+# encoding: utf-8
+
+"""
+Long lived JVMs for the Java build tools.
+
+The Closure Compiler, Closure Templates, Closure Stylesheets and htmlcompressor
+are all launched with 'java -jar', and for small development builds most of
+their run time goes into starting the JVM and warming up the JIT. When the
+server is enabled with --jvm-server, every jar is instead run inside a
+Nailgun server (http://martiansoftware.com/nailgun/) that is started on first
+use and kept alive for the rest of the waf process, e.g. across all the
+rebuilds of 'waf daemon'. Tasks send their command line to it over a local
+socket using the Nailgun protocol, so no client binary is needed.
+
+Each jar gets its own server, listening on a port of 127.0.0.1 that it picks
+itself. Without the Nailgun server jar (bootstrap.sh downloads it), or when a
+server fails to start, tasks fall back to launching java as before.
+
+Nailgun does not authenticate its clients: while a server runs, any local
+user can connect to it and run any class of its classpath as the user running
+waf. Only enable the servers on machines you do not share.
+
+    def configure(ctx):
+        ctx.load('jvmserver')
+        ctx.find_nailgun(path='src/client/tools')
+
+    class my_task(Task.Task):
+        def run(self):
+            return jvmserver.run_jar(self, self.env.MY_JAR, 'com.example.Main', args)
+"""
+
+import os, re, sys, atexit, socket, struct, threading
+from waflib import *
+from waflib.Configure import conf
+
+NAILGUN_MAIN = 'com.martiansoftware.nailgun.NGServer'
+
+# Printed by NGServer once it listens, e.g. 'NGServer 0.9.1 started on
+# 127.0.0.1, port 41235.'
+STARTED_RE = re.compile(r'started on .*, port (\d+)\.')
+
+# Seconds to wait for a new server to accept connections.
+STARTUP_TIMEOUT = 30
+
+# Seconds between the heartbeats sent while a command is running.
+HEARTBEAT_INTERVAL = 1
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+def options(ctx):
+    ctx.add_option('--jvm-server', action='store_true', default=False,
+            dest='jvm_server',
+            help='Run the Java tools in long lived JVMs, which any local user can use')
+
+@conf
+def find_nailgun(ctx, path='.'):
+    """Sets NAILGUN_JAR if the (optional) Nailgun server jar is found."""
+
+    tool_path = ctx.path.find_dir(path)
+    if not tool_path:
+        ctx.fatal('Unable to locate tool path ({0})'.format(path))
+
+    node = tool_path.find_node('nailgun/nailgun-server.jar')
+    ctx.msg('Checking for Nailgun server', node and node.abspath() or False)
+    if node:
+        ctx.env.NAILGUN_JAR = node.abspath()
+
+def configure(ctx):
+    ctx.find_program('java', var='JAVA')
+
+def is_enabled():
+    return getattr(Options.options, 'jvm_server', False)
+
+
+class NailgunError(Exception):
+    pass
+
+
+class NailgunServer(object):
+    """A Nailgun server running the main classes of a single jar."""
+
+    def __init__(self, java, nailgun_jar, jar):
+        self.java = java
+        self.nailgun_jar = nailgun_jar
+        self.jar = jar
+        self.port = None
+        self.proc = None
+
+    def start(self):
+        # The server binds a free port itself and prints it, any port picked
+        # here could be taken before the server binds it.
+        classpath = os.pathsep.join([self.nailgun_jar, self.jar])
+        cmd = [self.java, '-cp', classpath, NAILGUN_MAIN, '127.0.0.1:0']
+
+        Logs.info('Starting JVM server for {0}'.format(os.path.basename(self.jar)))
+        devnull = open(os.devnull, 'w')
+        try:
+            self.proc = Utils.subprocess.Popen(cmd,
+                    stdout=Utils.subprocess.PIPE, stderr=devnull)
+        finally:
+            devnull.close()
+
+        started = threading.Event()
+        reader = threading.Thread(target=self._read_stdout, args=(started,))
+        reader.daemon = True
+        reader.start()
+
+        started.wait(STARTUP_TIMEOUT)
+        if self.port is not None:
+            return
+
+        if self.proc.poll() is not None:
+            raise NailgunError('JVM server exited with {0}'.format(self.proc.returncode))
+
+        self.stop()
+        raise NailgunError('JVM server did not start within {0}s'.format(STARTUP_TIMEOUT))
+
+    def _read_stdout(self, started):
+        """Reads the port from the server's output, then keeps draining it."""
+        for line in iter(self.proc.stdout.readline, ''):
+            if self.port is None:
+                match = STARTED_RE.search(line)
+                if match:
+                    self.port = int(match.group(1))
+                    started.set()
+        started.set() # Exited
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def connect(self):
+        return socket.create_connection(('127.0.0.1', self.port))
+
+    def _send(self, sock, chunk_type, payload=''):
+        sock.sendall(struct.pack('>ic', len(payload), chunk_type) + payload)
+
+    def _recv(self, sock, size):
+        data = ''
+        while len(data) < size:
+            try:
+                chunk = sock.recv(size - len(data))
+            except socket.timeout:
+                # Keep the server from timing out long running commands.
+                self._send(sock, 'H')
+                continue
+            if not chunk:
+                raise NailgunError('Connection to the JVM server was closed')
+            data += chunk
+        return data
+
+    def run(self, main_class, args, cwd):
+        """Runs main_class with args, returns (exit code, stdout, stderr)."""
+
+        sock = self.connect()
+        sock.settimeout(HEARTBEAT_INTERVAL)
+        try:
+            for arg in args:
+                self._send(sock, 'A', arg)
+            self._send(sock, 'D', cwd)
+            self._send(sock, 'C', main_class)
+
+            out, err = [], []
+            while True:
+                size, chunk_type = struct.unpack('>ic', self._recv(sock, 5))
+                payload = self._recv(sock, size)
+
+                if chunk_type == '1':
+                    out.append(payload)
+                elif chunk_type == '2':
+                    err.append(payload)
+                elif chunk_type == 'S':
+                    # The tools never read stdin.
+                    self._send(sock, '.')
+                elif chunk_type == 'X':
+                    return int(payload.strip()), ''.join(out), ''.join(err)
+                else:
+                    raise NailgunError('Unexpected chunk type ({0})'.format(chunk_type))
+        finally:
+            sock.close()
+
+    def stop(self):
+        if not self.alive():
+            return
+
+        if self.port is None:
+            self.proc.terminate()
+            self.proc.wait()
+            return
+
+        try:
+            sock = self.connect()
+            try:
+                self._send(sock, 'D', os.getcwd())
+                self._send(sock, 'C', 'ng-stop')
+            finally:
+                sock.close()
+            self.proc.wait()
+        except socket.error:
+            self.proc.terminate()
+            self.proc.wait()
+
+
+def get_server(env, jar):
+    """Returns the running server for jar, or None to launch java directly."""
+
+    if not is_enabled() or not env.NAILGUN_JAR:
+        return None
+
+    with _servers_lock:
+        server = _servers.get(jar)
+        if server is False:
+            return None # Failed to start before
+        if server and server.alive():
+            return server
+
+        server = NailgunServer(env.JAVA, env.NAILGUN_JAR, jar)
+        try:
+            server.start()
+        except (NailgunError, OSError, socket.error) as e:
+            Logs.warn('Unable to start a JVM server for {0}: {1}'.format(jar, e))
+            _servers[jar] = False
+            return None
+
+        _servers[jar] = server
+        return server
+
+def run_jar(task, jar, main_class, args):
+    """Runs an executable jar for task, in a JVM server when possible.
+
+    main_class must be the Main-Class of the jar, as Nailgun runs classes
+    rather than jars.
+    """
+
+    server = get_server(task.env, jar)
+    if server is None:
+        return task.exec_command([task.env.JAVA, '-jar', jar] + args)
+
+    cwd = task.generator.bld.variant_dir
+    try:
+        ret, out, err = server.run(main_class, args, cwd)
+    except (NailgunError, socket.error) as e:
+        Logs.warn('JVM server for {0} failed ({1}), launching java'.format(jar, e))
+        return task.exec_command([task.env.JAVA, '-jar', jar] + args)
+
+    if out:
+        sys.stdout.write(out)
+    if err:
+        sys.stderr.write(err)
+    return ret
+
+def shutdown():
+    """Stops all the JVM servers."""
+
+    with _servers_lock:
+        for server in _servers.values():
+            if server:
+                server.stop()
+        _servers.clear()
+
+atexit.register(shutdown)
@@ -20,9 +20,14 @@ def build(ctx):
 
 ===========================================================
 """
+import os, re
+
 from waflib import Task
 from waflib.TaskGen import feature, extension
 
+# @import "file"; @import url('file'); @import (reference) "file";
+IMPORT_RE = re.compile(r'''@import\s*(?:\([^)]*\)\s*)?(?:url\(\s*)?["']([^"']+)["']''')
+
 def configure(ctx):
     ctx.find_program('lessc', var='LESSC')
 
@@ -36,7 +41,44 @@ def compile_less(self):
     target = self.target or self.source.get_bld().change_ext('.css')
     self.create_task('lessc', self.source, [target])
 
+def scan_imports(node):
+    """Returns the .less files node imports, and the names that were not found"""
+
+    nodes = []
+    names = []
+    for name in IMPORT_RE.findall(node.read()):
+        if name.endswith('.css') or '://' in name:
+            continue # Left as a CSS @import by lessc
+        if not os.path.splitext(name)[1]:
+            name += '.less'
+
+        dep = node.parent.find_resource(name)
+        if dep:
+            nodes.append(dep)
+        else:
+            names.append(name)
+    return nodes, names
+
+@Task.update_outputs
 class lessc(Task.Task):
     """Compiles .less files """
     color   = 'YELLOW'
     run_str = '${LESSC} ${SRC} ${TGT}'
+
+    def scan(self):
+        """Follows the @import graph of the source"""
+        nodes = []
+        names = []
+
+        seen = set(self.inputs)
+        pending = list(self.inputs)
+        while pending:
+            deps, missing = scan_imports(pending.pop())
+            names += missing
+            for dep in deps:
+                if not dep in seen:
+                    seen.add(dep)
+                    nodes.append(dep)
+                    pending.append(dep)
+
+        return (nodes, names)
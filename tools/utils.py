@@ -2,12 +2,20 @@
 # encoding: utf-8
 # Samuel Hug, 2013
 
-from waflib import Task
+from waflib import Task, Utils
 from waflib.TaskGen import feature
 from waflib.Configure import conf
 
 import shutil, os
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ioctl cloning a file on copy-on-write filesystems (linux/fs.h)
+FICLONE = 0x40049409
+
 class copy_file(Task.Task):
     """Copies files """
     color   = 'GREEN'
@@ -34,3 +42,89 @@ def copy(self, source, target=None, **kw):
     self.add_to_group(tsk)
     return tsk
 
+
+def same_file(source, target):
+    """Whether target already holds the contents of source.
+
+    Files with the same size and mtime are assumed to be identical. When only
+    the mtime differs the contents are compared by hash, and the mtime of an
+    identical target is updated so the next check is cheap.
+    """
+    try:
+        tst = os.stat(target)
+    except OSError:
+        return False
+    sst = os.stat(source)
+
+    if (sst.st_dev, sst.st_ino) == (tst.st_dev, tst.st_ino):
+        return False # Hard link made by older builds, replaced by a copy
+    if sst.st_size != tst.st_size:
+        return False
+    if int(sst.st_mtime) == int(tst.st_mtime):
+        return True
+    if Utils.h_file(source) != Utils.h_file(target):
+        return False
+
+    os.utime(target, (sst.st_atime, sst.st_mtime))
+    return True
+
+class mirror_files(Task.Task):
+    """Mirrors many files to their targets in a single task.
+
+    Files are cloned on copy-on-write filesystems, and copied otherwise.
+    They are never hard linked, as a task writing a target in place would
+    then modify the source as well. Targets that already hold the contents
+    of their source are left alone.
+    """
+    color   = 'GREEN'
+
+    # Cleared once cloning fails, so it is not retried per file
+    can_clone = fcntl is not None
+
+    def run(self):
+        created = set()
+        for source, target in zip(self.inputs, self.outputs):
+            source, target = source.abspath(), target.abspath()
+
+            target_dir = os.path.dirname(target)
+            if not target_dir in created:
+                try:
+                    os.makedirs(target_dir)
+                except OSError:
+                    pass
+                created.add(target_dir)
+
+            if not same_file(source, target):
+                self.mirror(source, target)
+        return 0
+
+    def mirror(self, source, target):
+        try:
+            os.remove(target)
+        except OSError:
+            pass
+
+        if self.can_clone:
+            with open(source, 'rb') as src:
+                with open(target, 'wb') as tgt:
+                    try:
+                        fcntl.ioctl(tgt.fileno(), FICLONE, src.fileno())
+                        shutil.copystat(source, target)
+                        return
+                    except (IOError, OSError):
+                        mirror_files.can_clone = False
+
+        shutil.copy2(source, target)
+
+@conf
+def mirror(self, source, **kw):
+    """Mirrors the source nodes to the build directory with a single task"""
+    kw['env'] = self.env
+
+    if not isinstance(source, list):
+        source = [source]
+    tsk = mirror_files(**kw)
+    tsk.set_inputs(source)
+    tsk.set_outputs([node.get_bld() for node in source])
+    self.add_to_group(tsk)
+    return tsk